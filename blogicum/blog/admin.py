@@ -1,6 +1,22 @@
 from django.contrib import admin
+from django.http import StreamingHttpResponse
 
-from .models import Post, Category, Location
+from .export import EXPORT_CONTENT_TYPES, iter_export
+from .models import Post, Category, Comment, Location
+
+
+def export_action(kind, fmt):
+    @admin.action(description=f'Выгрузить выбранное в {fmt.upper()}')
+    def action(modeladmin, request, queryset):
+        response = StreamingHttpResponse(
+            iter_export(kind, fmt, queryset=queryset),
+            content_type=EXPORT_CONTENT_TYPES[fmt])
+        response['Content-Disposition'] = (
+            f'attachment; filename="{kind}.{fmt}"')
+        return response
+
+    action.__name__ = f'export_{kind}_{fmt}'
+    return action
 
 
 @admin.register(Post)
@@ -9,6 +25,17 @@ class PostAdmin(admin.ModelAdmin):
                     'is_published')
     list_filter = ('is_published', 'pub_date', 'category', 'location')
     search_fields = ('title', 'text', 'category__title', 'location__name')
+    actions = (export_action('posts', 'jsonl'),
+               export_action('posts', 'csv'))
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'created_at', 'author')
+    list_select_related = ('author', 'post')
+    search_fields = ('text',)
+    actions = (export_action('comments', 'jsonl'),
+               export_action('comments', 'csv'))
 
 
 @admin.register(Category)
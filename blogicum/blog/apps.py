@@ -5,3 +5,7 @@ class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name = 'Блог'
+
+    def ready(self):
+        from . import (object_cache, scheduling, signals,  # noqa: F401
+                       timelines)
@@ -0,0 +1,88 @@
+import csv
+import json
+import zlib
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment, Post
+
+EXPORT_CHUNK_SIZE: int = 2000
+EXPORT_FORMATS = ('jsonl', 'csv')
+EXPORT_CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+POST_EXPORT_FIELDS = (
+    'id', 'title', 'text', 'pub_date', 'created_at', 'is_published',
+    'image', 'author_id', 'author__username', 'category_id',
+    'category__slug', 'category__title', 'location_id', 'location__name',
+)
+COMMENT_EXPORT_FIELDS = (
+    'id', 'post_id', 'text', 'created_at', 'author_id', 'author__username',
+)
+
+EXPORT_MODELS = {
+    'posts': (Post, POST_EXPORT_FIELDS),
+    'comments': (Comment, COMMENT_EXPORT_FIELDS),
+}
+
+
+class Echo:
+    """Псевдо-буфер для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def get_export_queryset(kind, since=None, queryset=None):
+    model, fields = EXPORT_MODELS[kind]
+    if queryset is None:
+        queryset = model.objects.all()
+    if since is not None:
+        queryset = queryset.filter(created_at__gte=since)
+    return queryset.order_by('created_at', 'pk').values(*fields)
+
+
+def iter_jsonl(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def iter_csv(rows, fields):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in (row[field] for field in fields)
+        ])
+
+
+def iter_export(kind, fmt='jsonl', since=None, queryset=None,
+                chunk_size=EXPORT_CHUNK_SIZE):
+    """Построчно выгружает публикации или комментарии.
+
+    Строки читаются из БД порциями по chunk_size, поэтому память
+    не зависит от объёма выгрузки.
+    """
+    fields = EXPORT_MODELS[kind][1]
+    rows = get_export_queryset(kind, since, queryset).iterator(
+        chunk_size=chunk_size)
+    if fmt == 'csv':
+        return iter_csv(rows, fields)
+    return iter_jsonl(rows)
+
+
+def iter_encoded(chunks, compress=False):
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode()
+        return
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog import object_cache
+from blog.models import Post, make_excerpt
+
+BACKFILL_BATCH_SIZE: int = 1000
+
+
+class Command(BaseCommand):
+    help = 'Заполняет анонсы публикаций, сохранённых без них.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Пересчитать анонсы всех публикаций.')
+        parser.add_argument('--batch-size', type=int,
+                            default=BACKFILL_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        queryset = Post.objects.only('id', 'text').order_by('pk')
+        if not options['all']:
+            queryset = queryset.filter(excerpt='')
+        last_pk = 0
+        updated = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[
+                :options['batch_size']])
+            if not batch:
+                break
+            for post in batch:
+                post.excerpt = make_excerpt(post.text)
+            with transaction.atomic():
+                Post.objects.bulk_update(batch, ['excerpt'])
+            # bulk_update не отправляет сигналов: публикации в кэше
+            # остались бы со старым анонсом. Ленты от анонса не зависят.
+            object_cache.posts.invalidate([post.pk for post in batch])
+            last_pk = batch[-1].pk
+            updated += len(batch)
+        self.stdout.write(f'Обновлено анонсов: {updated}')
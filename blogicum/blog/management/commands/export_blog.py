@@ -0,0 +1,57 @@
+import sys
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from blog.export import (EXPORT_CHUNK_SIZE, EXPORT_FORMATS, EXPORT_MODELS,
+                         iter_encoded, iter_export)
+
+
+def parse_since(value):
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f'Неверный формат даты --since: {value}')
+        moment = datetime.combine(day, datetime.min.time())
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class Command(BaseCommand):
+    help = ('Потоковая выгрузка публикаций или комментариев '
+            'в JSONL или CSV.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORT_MODELS))
+        parser.add_argument('--format', dest='fmt', choices=EXPORT_FORMATS,
+                            default='jsonl')
+        parser.add_argument('--output', default='-',
+                            help='Путь к файлу; "-" — стандартный вывод.')
+        parser.add_argument('--gzip', action='store_true',
+                            help='Сжимать выгрузку gzip.')
+        parser.add_argument('--since',
+                            help='Выгружать только записи, добавленные '
+                                 'начиная с указанной даты (created_at).')
+        parser.add_argument('--chunk-size', type=int,
+                            default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        since = options['since'] and parse_since(options['since'])
+        chunks = iter_encoded(
+            iter_export(options['kind'], options['fmt'], since=since,
+                        chunk_size=options['chunk_size']),
+            compress=options['gzip'])
+        if options['output'] == '-':
+            self.write_chunks(chunks, sys.stdout.buffer)
+            return
+        with open(options['output'], 'wb') as stream:
+            self.write_chunks(chunks, stream)
+
+    def write_chunks(self, chunks, stream):
+        for chunk in chunks:
+            stream.write(chunk)
+        stream.flush()
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import scheduling
+
+PUBLISH_MAX_SLEEP: int = 60
+
+
+class Command(BaseCommand):
+    help = ('Отмечает отложенные публикации, дата которых наступила, '
+            'и сбрасывает зависящие от них кэши.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='Работать постоянно, просыпаясь к дате '
+                                 'ближайшей отложенной публикации.')
+        parser.add_argument('--max-sleep', type=int,
+                            default=PUBLISH_MAX_SLEEP,
+                            help='Наибольшая пауза между проверками, '
+                                 'секунд.')
+
+    def handle(self, *args, **options):
+        while True:
+            released = scheduling.release_due(force=True)
+            if released or not options['loop']:
+                self.stdout.write(f'Опубликовано: {released}')
+            if not options['loop']:
+                break
+            remaining = scheduling.seconds_until_next_transition()
+            if remaining is None or remaining > options['max_sleep']:
+                remaining = options['max_sleep']
+            time.sleep(max(1, remaining))
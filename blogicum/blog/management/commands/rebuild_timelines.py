@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from blog import timelines
+from blog.models import Category
+
+
+class Command(BaseCommand):
+    help = ('Строит заново списки публикаций главной страницы '
+            'и страниц категорий в кэше.')
+
+    def handle(self, *args, **options):
+        timelines.invalidate_all()
+        rebuilt = [timelines.index()] + [
+            timelines.category(category_id) for category_id in
+            Category.objects.filter(is_published=True).values_list(
+                'pk', flat=True)]
+        for timeline in rebuilt:
+            entry = timeline.get()
+            self.stdout.write(f'{timeline.name}: {len(entry["items"])} '
+                              f'из {entry["count"]}')
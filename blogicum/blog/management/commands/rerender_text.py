@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog import object_cache
+from blog.models import TEXT_RENDER_VERSION, Comment, Post
+
+RERENDER_BATCH_SIZE: int = 1000
+
+
+class Command(BaseCommand):
+    help = ('Пересобирает сохранённый HTML текстов публикаций '
+            'и комментариев, подготовленный по старым правилам.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Пересобрать HTML всех записей.')
+        parser.add_argument('--batch-size', type=int,
+                            default=RERENDER_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        for model in (Post, Comment):
+            queryset = model.objects.only('id', 'text').order_by('pk')
+            if not options['all']:
+                queryset = queryset.exclude(
+                    text_html_version=TEXT_RENDER_VERSION)
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: '
+                f'{self.rerender(model, queryset, options["batch_size"])}')
+
+    def rerender(self, model, queryset, batch_size):
+        last_pk = 0
+        updated = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                return updated
+            for obj in batch:
+                obj.fill_derived_fields()
+            with transaction.atomic():
+                model.objects.bulk_update(batch, model.derived_fields)
+            # bulk_update не отправляет сигналов: публикации в кэше
+            # остались бы со старым HTML.
+            if model is Post:
+                object_cache.posts.invalidate([obj.pk for obj in batch])
+            last_pk = batch[-1].pk
+            updated += len(batch)
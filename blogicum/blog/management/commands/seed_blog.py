@@ -0,0 +1,82 @@
+import os
+from datetime import datetime, time
+from time import monotonic
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from blog.seed import SEED_BATCH_SIZE, SEED_MODELS, make_vocabulary, seed
+
+
+def parse_epoch(value):
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, timezone.utc)
+    return moment
+
+
+def start_of_today():
+    return timezone.now().replace(hour=0, minute=0, second=0,
+                                  microsecond=0)
+
+
+class Command(BaseCommand):
+    help = ('Генерирует пользователей, категории, местоположения, '
+            'публикации и комментарии для нагрузочного тестирования.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--locations', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=30000)
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Зерно генератора; одинаковое зерно даёт '
+                                 'одинаковые данные.')
+        parser.add_argument('--epoch', type=parse_epoch,
+                            help='Дата или дата и время, от которых '
+                                 'отсчитываются даты публикаций; '
+                                 'по умолчанию начало текущих суток (UTC).')
+        parser.add_argument('--future-ratio', type=float, default=0.05,
+                            help='Доля отложенных публикаций.')
+        parser.add_argument('--unpublished-ratio', type=float, default=0.05,
+                            help='Доля снятых с публикации записей.')
+        parser.add_argument('--workers', type=int,
+                            default=os.cpu_count() or 1)
+        parser.add_argument('--batch-size', type=int,
+                            default=SEED_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        counts = {kind: options[kind] for kind in SEED_MODELS}
+        if counts['posts'] and not (
+                counts['users'] or SEED_MODELS['users'].objects.exists()):
+            raise CommandError('Для публикаций нужны пользователи.')
+        if counts['posts'] and not (
+                counts['categories']
+                or SEED_MODELS['categories'].objects.exists()):
+            raise CommandError('Для публикаций нужны категории.')
+        if counts['comments'] and not (
+                counts['posts'] or SEED_MODELS['posts'].objects.exists()):
+            raise CommandError('Для комментариев нужны публикации.')
+        context = {
+            'seed': options['seed'],
+            'epoch': options['epoch'] or start_of_today(),
+            'vocabulary': make_vocabulary(options['seed']),
+            'future_ratio': options['future_ratio'],
+            'unpublished_ratio': options['unpublished_ratio'],
+        }
+        started = monotonic()
+
+        def progress(kind, created):
+            self.stdout.write(
+                f'{kind}: {created} за {monotonic() - started:.1f} с')
+
+        seed(counts, context, workers=options['workers'],
+             batch_size=options['batch_size'], progress=progress)
+        self.stdout.write(self.style.SUCCESS('Генерация завершена.'))
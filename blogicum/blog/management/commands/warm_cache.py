@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import warmup
+from core.two_tier_cache import is_shared
+
+
+class Command(BaseCommand):
+    help = ('Прогревает кэши после развёртывания: запрашивает главную, '
+            'категории, профили активных авторов и самые обсуждаемые '
+            'публикации и выводит время ответа каждой страницы.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int,
+                            default=warmup.WARMUP_PAGES,
+                            help='Сколько первых страниц главной.')
+        parser.add_argument('--authors', type=int,
+                            default=warmup.WARMUP_AUTHORS,
+                            help='Сколько профилей авторов.')
+        parser.add_argument('--posts', type=int,
+                            default=warmup.WARMUP_POSTS,
+                            help='Сколько самых обсуждаемых публикаций.')
+        parser.add_argument('--threads', type=int,
+                            default=warmup.WARMUP_THREADS)
+
+    def handle(self, *args, **options):
+        if not is_shared():
+            raise CommandError(
+                'Кэш по умолчанию — LocMemCache: прогретые записи останутся '
+                'в памяти этой команды и пропадут после её завершения. '
+                'Настройте в CACHES общий кэш (memcached или '
+                'FileBasedCache).')
+        started = time.perf_counter()
+        results = warmup.warm(
+            warmup.iter_urls(options['pages'], options['authors'],
+                             options['posts']),
+            options['threads'])
+        for row in results:
+            line = f'{row["status"]} {row["ms"]:>8}ms {row["url"]}'
+            if row['status'] >= 400:
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+        self.stdout.write(
+            f'Страниц: {len(results)}, '
+            f'{time.perf_counter() - started:.1f} с.')
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.16 on 2026-10-19 10:21
+
+import blog.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_post_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='text_html',
+            field=blog.models.HTMLField(blank=True, editable=False, verbose_name='Текст в HTML'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='text_html_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Версия правил вывода текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=blog.models.HTMLField(blank=True, editable=False, verbose_name='Текст в HTML'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Версия правил вывода текста'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.16 on 2026-10-19 10:29
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def release_published(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.filter(pub_date__lte=timezone.now()).update(
+        is_released=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_text_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='is_released',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Дата публикации наступила'),
+        ),
+        migrations.RunPython(release_published,
+                             migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['is_released', 'pub_date'], name='blog_post_release_idx'),
+        ),
+    ]
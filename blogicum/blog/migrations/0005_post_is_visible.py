@@ -0,0 +1,44 @@
+# Generated by Django 3.2.16 on 2026-10-19 10:33
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_visibility(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.filter(is_published=True, category__is_published=True,
+                        pub_date__lte=timezone.now()).update(
+        is_visible=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_post_is_released'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='blog_post_release_idx',
+        ),
+        migrations.RemoveField(
+            model_name='post',
+            name='is_released',
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='is_visible',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Видна в лентах'),
+        ),
+        migrations.RunPython(fill_visibility,
+                             migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_visible', True)), fields=['-pub_date'], name='blog_post_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_visible', True)), fields=['category', '-pub_date'], name='blog_post_category_visible_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.16 on 2026-10-19 11:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_post_is_visible'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_published', True), ('is_visible', False)), fields=['pub_date'], name='blog_post_scheduled_idx'),
+        ),
+    ]
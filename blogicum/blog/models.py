@@ -1,9 +1,39 @@
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth import get_user_model
+from django.template.defaultfilters import linebreaksbr
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
 
 User = get_user_model()
 
 WORD_COUNT = 256
+EXCERPT_WORDS: int = 10
+# Увеличивается при изменении правил render_text: сохранённый HTML
+# старой версии пересобирается командой rerender_text.
+TEXT_RENDER_VERSION: int = 1
+
+
+def make_excerpt(text):
+    """Анонс для карточки публикации: как фильтр truncatewords."""
+    return Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+
+
+# Поля, от которых зависит Post.is_visible.
+VISIBILITY_FIELDS = frozenset(('is_published', 'pub_date', 'category'))
+
+
+def visible(now=None):
+    """Условие, при котором публикация видна в лентах;
+    поле Post.is_visible хранит его результат."""
+    return Q(is_published=True, category__is_published=True,
+             pub_date__lte=now or timezone.now())
+
+
+def render_text(text):
+    """HTML для вывода текста: экранирование и переносы строк."""
+    return linebreaksbr(text, autoescape=True)
 
 
 class PublishedModel(models.Model):
@@ -21,6 +51,51 @@ class PublishedModel(models.Model):
         abstract = True
 
 
+class HTMLField(models.TextField):
+    """Текст, уже подготовленный для вывода в шаблоне:
+    значения из БД помечаются безопасными для HTML."""
+
+    def from_db_value(self, value, expression, connection):
+        return value if value is None else mark_safe(value)
+
+
+class RenderedTextModel(models.Model):
+    text_html = HTMLField(
+        blank=True,
+        editable=False,
+        verbose_name='Текст в HTML'
+    )
+    text_html_version = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Версия правил вывода текста'
+    )
+
+    derived_fields = ('text_html', 'text_html_version')
+
+    class Meta:
+        abstract = True
+
+    @property
+    def rendered_text(self):
+        if self.text_html_version != TEXT_RENDER_VERSION:
+            return render_text(self.text)
+        return self.text_html
+
+    def fill_derived_fields(self):
+        self.text_html = render_text(self.text)
+        self.text_html_version = TEXT_RENDER_VERSION
+
+    def save(self, *args, **kwargs):
+        if 'text' not in self.get_deferred_fields():
+            self.fill_derived_fields()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'text' in update_fields:
+                kwargs['update_fields'] = {*update_fields,
+                                           *self.derived_fields}
+        super().save(*args, **kwargs)
+
+
 class Category(PublishedModel):
     title = models.CharField(
         max_length=WORD_COUNT,
@@ -64,7 +139,7 @@ class Location(PublishedModel):
         return self.name
 
 
-class Post(PublishedModel):
+class Post(PublishedModel, RenderedTextModel):
     title = models.CharField(
         max_length=WORD_COUNT,
         verbose_name='Заголовок'
@@ -72,12 +147,24 @@ class Post(PublishedModel):
     text = models.TextField(
         verbose_name='Текст'
     )
+    excerpt = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Анонс'
+    )
     pub_date = models.DateTimeField(
         verbose_name='Дата и время публикации',
         help_text='Если установить дату и время '
                   'в будущем — можно делать'
                   'отложенные публикации.'
     )
+    # Для отложенных публикаций устанавливается командой
+    # publish_scheduled или первым обращением к ленте после pub_date.
+    is_visible = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Видна в лентах'
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -104,12 +191,69 @@ class Post(PublishedModel):
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
+        indexes = (
+            # Частичные индексы: в них только видимые публикации,
+            # и ленты читают их по порядку pub_date без сортировки.
+            models.Index(fields=('-pub_date',),
+                         condition=Q(is_visible=True),
+                         name='blog_post_visible_idx'),
+            models.Index(fields=('category', '-pub_date'),
+                         condition=Q(is_visible=True),
+                         name='blog_post_category_visible_idx'),
+            # Отложенные публикации: ближайшая дата и наступившие
+            # читаются без просмотра всей таблицы.
+            models.Index(fields=('pub_date',),
+                         condition=Q(is_visible=False, is_published=True),
+                         name='blog_post_scheduled_idx'),
+        )
+
+    derived_fields = RenderedTextModel.derived_fields + ('excerpt',)
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        if not VISIBILITY_FIELDS & self.get_deferred_fields():
+            self.is_visible = (self.is_published
+                               and self.pub_date is not None
+                               and self.pub_date <= timezone.now()
+                               and self.category is not None
+                               and self.category.is_published)
+            update_fields = kwargs.get('update_fields')
+            if (update_fields is not None
+                    and VISIBILITY_FIELDS & set(update_fields)):
+                kwargs['update_fields'] = {*update_fields, 'is_visible'}
+        super().save(*args, **kwargs)
+
+    def fill_derived_fields(self):
+        super().fill_derived_fields()
+        self.excerpt = make_excerpt(self.text)
+
+
+def refresh_visibility(queryset, now=None, hide=True):
+    """Пересчитывает is_visible публикаций из queryset одним UPDATE
+    в каждую сторону; возвращает первичные ключи изменённых.
+
+    Нужна там, где save() публикаций не вызывается: смена
+    is_published категории, её удаление, наступление даты публикации.
+    hide=False — только показать публикации, которые стали видны
+    (для queryset из скрытых публикаций второй запрос не нужен).
+    """
+    condition = visible(now)
+    changes = [(queryset.filter(condition, is_visible=False), True)]
+    if hide:
+        changes.append(
+            (queryset.filter(is_visible=True).exclude(condition), False))
+    pks = []
+    for changed, value in changes:
+        changed_pks = list(changed.values_list('pk', flat=True))
+        if changed_pks:
+            changed.update(is_visible=value)
+            pks.extend(changed_pks)
+    return pks
+
 
-class Comment(models.Model):
+class Comment(RenderedTextModel):
     text = models.TextField('Текст')
     post = models.ForeignKey(
         Post,
@@ -0,0 +1,207 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import Max
+from django.http import Http404
+
+from core import tasks
+from core.bloom import BloomFilter
+from core.two_tier_cache import TwoTierCache
+
+from .models import Category, Post
+
+User = get_user_model()
+
+NEGATIVE_CACHE_TIMEOUT: int = 300
+BLOOM_REBUILD_INTERVAL: int = 600
+# Запас ёмкости фильтра на записи, добавленные до следующей перестройки.
+BLOOM_CAPACITY_MARGIN: float = 1.5
+# Наибольший размер фильтра: запись memcached не больше 1 МБ.
+BLOOM_MAX_BYTES: int = 900 * 1024
+# Перестройку, которая не завершилась за это время, ставят снова.
+BLOOM_REBUILD_TIMEOUT: int = 300
+
+store = TwoTierCache('negative')
+
+indexes = {}
+
+
+class MembershipIndex:
+    """Отсекает запросы к заведомо несуществующим объектам без БД.
+
+    Фильтр Блума по значениям поля строится задачей очереди rebuild,
+    хранится в кэше и перестраивается раз в BLOOM_REBUILD_INTERVAL
+    секунд; запросы его только читают. Новые значения не должны давать
+    ложный 404: для первичного ключа значения больше максимального
+    на момент построения всегда проверяются в БД, для остальных полей
+    сохранение объекта увеличивает поколение, и до перестройки фильтр
+    не используется. Промахи, которые фильтр пропустил, запоминаются
+    на NEGATIVE_CACHE_TIMEOUT секунд или до создания объекта с новым
+    значением.
+    """
+
+    def __init__(self, name, model, field):
+        self.name = name
+        self.model = model
+        self.field = field
+        self.watermark = field == 'pk'
+        self.state = None
+        indexes[name] = self
+
+    def key(self, suffix):
+        return f'negative:{self.name}:{suffix}'
+
+    def counter(self, name):
+        # Счётчики начинаются со времени создания: после вытеснения
+        # ключа из кэша значение не совпадёт с уже виденным процессами,
+        # и, например, старый фильтр не будет принят за свежий.
+        return store.get_or_set(self.key(name), time.time_ns, None)
+
+    def bump(self, name):
+        try:
+            store.incr(self.key(name))
+        except ValueError:
+            store.set(self.key(name), time.time_ns(), None)
+
+    def generation(self):
+        return self.counter('generation')
+
+    def missing_key(self, value):
+        return self.key(f'missing:{self.counter("markers")}:{value}')
+
+    def is_current(self, state, generation):
+        return state is not None and state['generation'] == generation
+
+    def is_fresh(self, state, generation):
+        return self.is_current(state, generation) and (
+            time.time() - state['built_at'] < getattr(
+                settings, 'BLOOM_REBUILD_INTERVAL', BLOOM_REBUILD_INTERVAL))
+
+    def build(self):
+        # Поколение читается до обхода таблицы: объект, сохранённый
+        # во время обхода, сменит его, и фильтр не будет принят
+        # за актуальный.
+        generation = self.generation()
+        queryset = self.model.objects.all()
+        max_pk = queryset.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+        if self.watermark:
+            queryset = queryset.filter(pk__lte=max_pk)
+        bloom = BloomFilter(
+            int(queryset.count() * BLOOM_CAPACITY_MARGIN) + 1000,
+            max_size=getattr(settings, 'BLOOM_MAX_BYTES',
+                             BLOOM_MAX_BYTES) * 8)
+        for value in queryset.values_list(self.field, flat=True).iterator():
+            bloom.add(value)
+        state = {'bloom': bloom, 'built_at': time.time(),
+                 'generation': generation, 'max_pk': max_pk}
+        store.set(self.key('bloom'), state, None, broadcast=False)
+        return state
+
+    def schedule_rebuild(self):
+        # Перестройку ставит в очередь один процесс; ключ снимает
+        # задача, а если она не выполнилась — истечение срока.
+        if cache.add(self.key('rebuilding'), True, getattr(
+                settings, 'BLOOM_REBUILD_TIMEOUT', BLOOM_REBUILD_TIMEOUT)):
+            tasks.enqueue(rebuild, self.name)
+
+    def load_state(self):
+        # Фильтр хранится в self.state, копия в кэше процесса не нужна.
+        return store.get_many([self.key('bloom')], local=False).get(
+            self.key('bloom'))
+
+    def get_state(self):
+        """Фильтр текущего поколения или None, пока его строят.
+
+        Устаревший по времени фильтр используется до готовности нового.
+        """
+        generation = self.generation()
+        if not self.is_fresh(self.state, generation):
+            state = self.load_state()
+            if not self.is_fresh(state, generation):
+                self.schedule_rebuild()
+                # С TASKS_EAGER фильтр уже перестроен.
+                state = self.load_state() or state
+            self.state = state or self.state
+        if not self.is_current(self.state, generation):
+            return None
+        return self.state
+
+    def might_exist(self, value):
+        state = self.get_state()
+        if state is None:
+            return True
+        if self.watermark and int(value) > state['max_pk']:
+            return True
+        return value in state['bloom']
+
+    def check(self, value):
+        """Http404, если объекта со значением value заведомо нет."""
+        if getattr(settings, 'NEGATIVE_CACHE_ENABLED', False) and (
+                not self.might_exist(value)
+                or store.get(self.missing_key(value))):
+            raise Http404
+
+    def missing(self, value):
+        """Запоминает, что объекта со значением value нет,
+        и отвечает 404."""
+        if getattr(settings, 'NEGATIVE_CACHE_ENABLED', False):
+            store.set(self.missing_key(value), True, getattr(
+                settings, 'NEGATIVE_CACHE_TIMEOUT', NEGATIVE_CACHE_TIMEOUT),
+                broadcast=False)
+        raise Http404
+
+    def get_object_or_404(self, queryset, value, **filters):
+        self.check(value)
+        try:
+            return queryset.get(**{self.field: value, **filters})
+        except ObjectDoesNotExist:
+            self.missing(value)
+
+    def saved(self, value, changed=True):
+        """Вызывается после сохранения объекта со значением value;
+        changed — объект создан или значение поля изменилось.
+
+        Отметки промахов сбрасываются сменой счётчика в их ключах,
+        поэтому устаревают во всех процессах, а не только в том,
+        который сохранил объект. Счётчики меняются после фиксации
+        транзакции: фильтр или отметка, построенные до неё по старым
+        данным, иначе получили бы уже новые счётчики.
+        """
+        if not changed:
+            return
+        if self.watermark:
+            transaction.on_commit(lambda: self.bump('markers'))
+        else:
+            self.invalidate()
+
+    def invalidate(self):
+        transaction.on_commit(self.reset)
+
+    def reset(self):
+        self.bump('markers')
+        self.bump('generation')
+        self.schedule_rebuild()
+
+
+@tasks.task
+def rebuild(name):
+    """Строит фильтр Блума индекса name и сохраняет его в кэше."""
+    index = indexes[name]
+    try:
+        index.build()
+    finally:
+        cache.delete(index.key('rebuilding'))
+
+
+posts = MembershipIndex('posts', Post, 'pk')
+categories = MembershipIndex('categories', Category, 'slug')
+users = MembershipIndex('users', User, 'username')
+
+
+def invalidate_all():
+    for index in (posts, categories, users):
+        index.invalidate()
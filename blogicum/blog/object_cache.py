@@ -0,0 +1,217 @@
+import copy
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.two_tier_cache import TwoTierCache
+
+from .models import Category, Comment, Location, Post
+from .signals import post_changed
+
+User = get_user_model()
+
+OBJECT_CACHE_TIMEOUT: int = 3600
+POST_RELATED = ('author', 'category', 'location')
+
+store = TwoTierCache('objects')
+
+
+def is_enabled():
+    return getattr(settings, 'OBJECT_CACHE_ENABLED', False)
+
+
+def get_timeout():
+    return getattr(settings, 'OBJECT_CACHE_TIMEOUT', OBJECT_CACHE_TIMEOUT)
+
+
+class ObjectCache:
+    """Кэш экземпляров модели по первичному ключу.
+
+    Связанные объекты не кэшируются вместе с экземпляром: у каждой
+    модели свой кэш, и запись удаляется при сохранении или удалении
+    только своего объекта.
+    """
+
+    def __init__(self, name, queryset, related=None):
+        self.name = name
+        self.queryset = queryset
+        # {поле: кэш}: при промахе связанные объекты загружаются тем же
+        # запросом (select_related) и сохраняются в своих кэшах.
+        self.related = related or {}
+
+    def key(self, pk):
+        return f'object:{self.name}:{pk}'
+
+    def alias_key(self, field, value):
+        return f'object:{self.name}:{field}:{value}'
+
+    def get_many(self, pks):
+        return fetch({self: pks})[self]
+
+    def get(self, pk):
+        return self.get_many([pk]).get(pk)
+
+    def get_by(self, field, value):
+        """Объект с полем field, равным value, или None.
+
+        Соответствие значения и первичного ключа тоже хранится в кэше;
+        оно проверяется по найденному объекту, поэтому не устаревает.
+        """
+        if is_enabled():
+            pk = store.get(self.alias_key(field, value))
+            obj = None if pk is None else self.get(pk)
+            if obj is not None and getattr(obj, field) == value:
+                return obj
+        obj = self.queryset.filter(**{field: value}).first()
+        if obj is not None and is_enabled():
+            store.set_many({self.key(obj.pk): obj,
+                            self.alias_key(field, value): obj.pk},
+                           get_timeout(), broadcast=False)
+        return obj
+
+    def invalidate(self, pks):
+        """Удаляет объекты pks из кэша после фиксации транзакции.
+
+        Удалённую до фиксации запись другой запрос успел бы загрузить
+        из БД заново со старыми значениями.
+        """
+        keys = [self.key(pk) for pk in pks]
+        transaction.on_commit(lambda: store.delete_many(keys))
+
+    def load(self, pks):
+        """Загружает объекты из БД; возвращает их и записи для кэша."""
+        objects = self.queryset.select_related(*self.related).in_bulk(pks)
+        entries = {}
+        for pk, obj in objects.items():
+            for name, related_cache in self.related.items():
+                value = getattr(obj, name)
+                if value is not None:
+                    entries[related_cache.key(value.pk)] = value
+            entries[self.key(pk)] = detach(obj)
+        return objects, entries
+
+
+def detach(obj):
+    """Копия объекта без загруженных связанных объектов."""
+    clone = copy.copy(obj)
+    clone._state = copy.copy(obj._state)
+    clone._state.fields_cache = {}
+    return clone
+
+
+def fetch(requests):
+    """Загружает объекты нескольких кэшей: {кэш: ключи} → {кэш: {pk: obj}}.
+
+    Все ключи читаются одним обращением к кэшу, промахи — одним
+    запросом к БД на модель.
+    """
+    requests = {object_cache: set(pks) - {None}
+                for object_cache, pks in requests.items()}
+    if not is_enabled():
+        return {object_cache: object_cache.queryset.in_bulk(pks)
+                for object_cache, pks in requests.items()}
+    keys = {object_cache.key(pk): (object_cache, pk)
+            for object_cache, pks in requests.items() for pk in pks}
+    found = {object_cache: {} for object_cache in requests}
+    if not keys:
+        return found
+    for key, obj in store.get_many(keys).items():
+        object_cache, pk = keys[key]
+        found[object_cache][pk] = obj
+    loaded = {}
+    for object_cache, pks in requests.items():
+        missing = pks - found[object_cache].keys()
+        if missing:
+            objects, entries = object_cache.load(missing)
+            found[object_cache].update(objects)
+            loaded.update(entries)
+    if loaded:
+        store.set_many(loaded, get_timeout(), broadcast=False)
+    return found
+
+
+class PostLoader:
+    """Загружает публикации по ключам вместе с автором, категорией
+    и местоположением; comment_count — добавить число комментариев.
+
+    С OBJECT_CACHE_ENABLED объекты берутся из кэшей, иначе —
+    одним запросом с select_related.
+    """
+
+    def __init__(self, comment_count=False):
+        self.comment_count = comment_count
+
+    def prepare(self, queryset):
+        queryset = queryset.select_related(*POST_RELATED).defer('text')
+        if self.comment_count:
+            queryset = queryset.annotate(comment_count=Count('comments'))
+        return queryset
+
+    def __call__(self, pks):
+        if not is_enabled():
+            found = self.prepare(Post.objects).in_bulk(pks)
+            return [found[pk] for pk in pks if pk in found]
+        found = posts.get_many(pks)
+        # Публикации, загруженные из БД, уже получили связанные объекты.
+        missing = {
+            (name, related_cache): {
+                getattr(post, f'{name}_id') for post in found.values()
+                if not Post._meta.get_field(name).is_cached(post)}
+            for name, related_cache in posts.related.items()
+        }
+        related = fetch({related_cache: pks for (_, related_cache), pks
+                         in missing.items()})
+        if self.comment_count:
+            counts = dict(Comment.objects.filter(post__in=found).order_by()
+                          .values('post').annotate(count=Count('pk'))
+                          .values_list('post', 'count'))
+        result = []
+        for pk in pks:
+            post = found.get(pk)
+            if post is None:
+                continue
+            for name, related_cache in posts.related.items():
+                value = related[related_cache].get(
+                    getattr(post, f'{name}_id'))
+                if value is not None:
+                    setattr(post, name, value)
+            if self.comment_count:
+                post.comment_count = counts.get(pk, 0)
+            result.append(post)
+        return result
+
+
+def get_post(pk):
+    return next(iter(PostLoader()([pk])), None)
+
+
+users = ObjectCache('users', User.objects.defer('password'))
+categories = ObjectCache('categories', Category.objects.all())
+locations = ObjectCache('locations', Location.objects.all())
+posts = ObjectCache('posts', Post.objects.defer('text', 'author__password'),
+                    related={'author': users, 'category': categories,
+                             'location': locations})
+
+
+@receiver(post_changed, sender=Post)
+def post_changed_received(sender, pks, **kwargs):
+    posts.invalidate(pks)
+
+
+@receiver((post_save, post_delete), sender=User)
+def user_changed(sender, instance, **kwargs):
+    users.invalidate([instance.pk])
+
+
+@receiver((post_save, post_delete), sender=Category)
+def category_changed(sender, instance, **kwargs):
+    categories.invalidate([instance.pk])
+
+
+@receiver((post_save, post_delete), sender=Location)
+def location_changed(sender, instance, **kwargs):
+    locations.invalidate([instance.pk])
@@ -0,0 +1,78 @@
+import math
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.two_tier_cache import TwoTierCache
+
+from .models import Post, refresh_visibility
+from .signals import post_changed
+
+NEXT_TRANSITION_KEY = 'blog:next_transition'
+# Сколько секунд процесс может не знать об отложенной публикации,
+# сохранённой в другом процессе (если кэш локальный для процесса).
+SCHEDULE_CHECK_INTERVAL: int = 60
+
+store = TwoTierCache('scheduling')
+
+
+def next_transition():
+    """Timestamp ближайшей даты публикации среди скрытых
+    из-за неё публикаций; inf, если таких публикаций нет."""
+    timestamp = store.get(NEXT_TRANSITION_KEY)
+    if timestamp is None:
+        pub_date = Post.objects.filter(
+            is_visible=False, is_published=True,
+            category__is_published=True,
+        ).aggregate(next=Min('pub_date'))['next']
+        timestamp = pub_date.timestamp() if pub_date else math.inf
+        store.set(NEXT_TRANSITION_KEY, timestamp, getattr(
+            settings, 'SCHEDULE_CHECK_INTERVAL', SCHEDULE_CHECK_INTERVAL),
+            broadcast=False)
+    return timestamp
+
+
+def release_due(now=None, force=False):
+    """Отмечает публикации, дата которых наступила, и отправляет
+    для них post_changed — как при редактировании.
+
+    Пока ближайшая дата не наступила, обходится без запросов к БД;
+    force — проверить БД в любом случае. Возвращает число
+    отмеченных публикаций.
+    """
+    now = now or timezone.now()
+    if not force and now.timestamp() < next_transition():
+        return 0
+    pks = refresh_visibility(
+        Post.objects.filter(is_visible=False, is_published=True), now,
+        hide=False)
+    if pks:
+        # До наступления даты публикации не входили ни в одну ленту.
+        post_changed.send(sender=Post, pks=pks,
+                          previous=dict.fromkeys(pks, (None, False)))
+    invalidate()
+    return len(pks)
+
+
+def seconds_until_next_transition(now=None):
+    """Сколько секунд ленты не изменятся сами по себе: до ближайшей
+    отложенной публикации; None, если таких публикаций нет."""
+    remaining = next_transition() - (now or timezone.now()).timestamp()
+    if math.isinf(remaining):
+        return None
+    return max(0, math.ceil(remaining))
+
+
+def invalidate():
+    # После фиксации транзакции: иначе другой процесс успел бы снова
+    # вычислить ближайшую дату без сохраняемой публикации.
+    transaction.on_commit(lambda: store.delete(NEXT_TRANSITION_KEY))
+
+
+@receiver(post_changed, sender=Post)
+def post_changed_received(sender, **kwargs):
+    # Сохранение могло добавить отложенную публикацию или перенести дату.
+    invalidate()
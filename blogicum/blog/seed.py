@@ -0,0 +1,248 @@
+import multiprocessing
+import random
+from array import array
+from datetime import timedelta
+from itertools import accumulate
+
+import django
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+
+from . import negative_cache, scheduling, timelines
+from .models import Category, Comment, Location, Post, refresh_visibility
+
+SEED_BATCH_SIZE: int = 5000
+ZIPF_EXPONENT: float = 1.1
+PUB_DATE_MEAN_AGE_DAYS: int = 180
+FUTURE_HORIZON_DAYS: int = 60
+# Отложенные публикации начинаются через сутки после epoch: при epoch,
+# равном началу текущего дня, они остаются в будущем весь день.
+FUTURE_MIN_DAYS: int = 1
+SYLLABLES = ('ка', 'ро', 'ми', 'на', 'ту', 'ле', 'вор', 'ст', 'пи', 'зо',
+             'да', 'ль', 'ны', 'го', 'ре', 'ша', 'бу', 'ве', 'ти', 'ом')
+
+User = get_user_model()
+
+worker_context = {}
+
+SEED_MODELS = {
+    'users': User,
+    'categories': Category,
+    'locations': Location,
+    'posts': Post,
+    'comments': Comment,
+}
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def zipf_cum_weights(count):
+    return list(accumulate(
+        1 / rank ** ZIPF_EXPONENT for rank in range(1, count + 1)))
+
+
+def make_vocabulary(seed, size=2000, length=100000):
+    """Возвращает длинную случайную последовательность слов.
+
+    Тексты берутся срезами этой последовательности: это во много раз
+    быстрее, чем выбирать каждое слово отдельно.
+    """
+    rng = random.Random(f'{seed}:vocabulary')
+    words = [''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+             for _ in range(size)]
+    return rng.choices(words, k=length)
+
+
+def make_text(rng, vocabulary, min_words, max_words):
+    count = rng.randint(min_words, max_words)
+    start = rng.randrange(len(vocabulary) - count)
+    return ' '.join(vocabulary[start:start + count])
+
+
+def generate_users(rng, context, start, count):
+    return [
+        User(id=pk, username=f'seed_user_{pk}', email=f'user{pk}@seed.test',
+             password=UNUSABLE_PASSWORD_PREFIX + 'seed')
+        for pk in range(start, start + count)
+    ]
+
+
+def generate_categories(rng, context, start, count):
+    vocabulary = context['vocabulary']
+    return [
+        Category(id=pk, slug=f'seed-category-{pk}',
+                 title=make_text(rng, vocabulary, 1, 3).capitalize(),
+                 description=make_text(rng, vocabulary, 10, 30),
+                 is_published=rng.random() >= context['unpublished_ratio'])
+        for pk in range(start, start + count)
+    ]
+
+
+def generate_locations(rng, context, start, count):
+    vocabulary = context['vocabulary']
+    return [
+        Location(id=pk, name=make_text(rng, vocabulary, 1, 2).capitalize())
+        for pk in range(start, start + count)
+    ]
+
+
+def generate_posts(rng, context, start, count):
+    vocabulary = context['vocabulary']
+    epoch = context['epoch']
+    category_ids = context['category_ids']
+    category_weights = zipf_cum_weights(len(category_ids))
+    user_ids = context['user_ids']
+    user_weights = zipf_cum_weights(len(user_ids))
+    location_ids = context['location_ids']
+    posts = []
+    for pk in range(start, start + count):
+        if rng.random() < context['future_ratio']:
+            pub_date = epoch + timedelta(days=rng.uniform(
+                FUTURE_MIN_DAYS, FUTURE_HORIZON_DAYS))
+        else:
+            pub_date = epoch - timedelta(days=rng.expovariate(
+                1 / PUB_DATE_MEAN_AGE_DAYS))
+        posts.append(Post(
+            id=pk,
+            title=make_text(rng, vocabulary, 2, 6).capitalize(),
+            text=make_text(rng, vocabulary, 20, 200),
+            pub_date=pub_date,
+            is_published=rng.random() >= context['unpublished_ratio'],
+            author_id=rng.choices(user_ids, cum_weights=user_weights)[0],
+            category_id=rng.choices(category_ids,
+                                    cum_weights=category_weights)[0],
+            location_id=(rng.choice(location_ids)
+                         if location_ids and rng.random() < 0.5 else None),
+        ))
+    return posts
+
+
+def generate_comments(rng, context, start, count):
+    vocabulary = context['vocabulary']
+    post_ids = context['post_ids']
+    user_ids = context['user_ids']
+    return [
+        Comment(
+            id=pk,
+            # Квадрат равномерной величины сосредотачивает комментарии
+            # на небольшой доле публикаций.
+            post_id=post_ids[int(len(post_ids) * rng.random() ** 2)],
+            author_id=rng.choice(user_ids),
+            text=make_text(rng, vocabulary, 3, 40),
+        )
+        for pk in range(start, start + count)
+    ]
+
+
+DEPENDENCIES = {
+    'users': (),
+    'categories': (),
+    'locations': (),
+    'posts': ('users', 'categories', 'locations'),
+    'comments': ('users', 'posts'),
+}
+
+GENERATORS = {
+    'users': generate_users,
+    'categories': generate_categories,
+    'locations': generate_locations,
+    'posts': generate_posts,
+    'comments': generate_comments,
+}
+
+
+def load_ids(model):
+    return array('q', model.objects.order_by('pk').values_list(
+        'pk', flat=True).iterator())
+
+
+def seed_chunk(task):
+    kind, chunk, start, count = task
+    rng = random.Random(f'{worker_context["seed"]}:{kind}:{chunk}')
+    objects = GENERATORS[kind](rng, worker_context, start, count)
+    # bulk_create не вызывает save(): анонс и HTML текста заполняются здесь.
+    for obj in objects:
+        if hasattr(obj, 'fill_derived_fields'):
+            obj.fill_derived_fields()
+    if connection.vendor == 'sqlite' and not connection.in_atomic_block:
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous = OFF')
+    with transaction.atomic():
+        SEED_MODELS[kind].objects.bulk_create(objects, batch_size=count)
+    return count
+
+
+def init_worker(context):
+    if not apps.ready:
+        django.setup()
+    worker_context.update(context)
+
+
+def split_tasks(kind, start, total, batch_size):
+    return [
+        (kind, chunk, offset, min(batch_size, start + total - offset))
+        for chunk, offset in enumerate(range(start, start + total,
+                                             batch_size))
+    ]
+
+
+def run_tasks(tasks, context, workers):
+    # SQLite допускает одного писателя, а передача готовых объектов
+    # между процессами обходится дороже их генерации, поэтому для SQLite
+    # порции обрабатываются в основном процессе.
+    if workers < 2 or connection.vendor == 'sqlite':
+        worker_context.update(context)
+        return sum(map(seed_chunk, tasks))
+    # Открытые соединения не должны наследоваться дочерними процессами.
+    connections.close_all()
+    with multiprocessing.Pool(workers, initializer=init_worker,
+                              initargs=(context,)) as pool:
+        return sum(pool.imap_unordered(seed_chunk, tasks))
+
+
+def reset_sequences():
+    """Сдвигает последовательности первичных ключей за явно заданные
+    при генерации id (в SQLite не требуется)."""
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), list(SEED_MODELS.values()))
+    if statements:
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+
+def seed(counts, context, workers=1, batch_size=SEED_BATCH_SIZE,
+         progress=None):
+    """Создаёт объекты в порядке зависимостей: пользователи, категории,
+    местоположения, публикации, комментарии.
+
+    Каждая порция получает собственный генератор случайных чисел,
+    а даты отсчитываются от context['epoch'], поэтому результат
+    определяется seed, epoch и размером порции, но не числом процессов.
+    """
+    for kind in GENERATORS:
+        total = counts.get(kind, 0)
+        if not total:
+            continue
+        for dependency in map(SEED_MODELS.get, DEPENDENCIES[kind]):
+            context[f'{dependency._meta.model_name}_ids'] = load_ids(
+                dependency)
+        tasks = split_tasks(kind, next_id(SEED_MODELS[kind]), total,
+                            batch_size)
+        created = run_tasks(tasks, context, workers)
+        if progress:
+            progress(kind, created)
+    reset_sequences()
+    # bulk_create не вызывает save() и не отправляет post_save: видимость
+    # публикаций, фильтры отсутствующих объектов, ленты и время
+    # ближайшей публикации нужно вычислить заново.
+    refresh_visibility(Post.objects.all())
+    negative_cache.invalidate_all()
+    scheduling.invalidate()
+    timelines.invalidate_all()
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import Signal, receiver
+
+from . import negative_cache
+from .models import Category, Post, refresh_visibility
+
+User = get_user_model()
+
+# Публикации с первичными ключами pks изменились: сохранены, удалены
+# или наступила их дата публикации. Аргументы: sender=Post, pks
+# и необязательный previous — прежние состояния публикаций
+# {pk: (category_id, is_visible) или None для новых}.
+post_changed = Signal()
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, **kwargs):
+    # Прежнее состояние нужно лентам: по нему видно, входила ли
+    # публикация в ленту главной страницы и своей категории.
+    if instance._state.adding:
+        instance._previous_state = None
+    else:
+        instance._previous_state = Post.objects.filter(
+            pk=instance.pk).values_list('category_id', 'is_visible').first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    negative_cache.posts.saved(instance.pk, changed=created)
+    post_changed.send(sender=Post, pks=[instance.pk],
+                      previous={instance.pk: instance._previous_state})
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    post_changed.send(sender=Post, pks=[instance.pk],
+                      previous={instance.pk: (instance.category_id,
+                                              instance.is_visible)})
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, update_fields, **kwargs):
+    negative_cache.categories.saved(
+        instance.slug, changed=update_fields is None
+        or 'slug' in update_fields)
+    if update_fields is None or 'is_published' in update_fields:
+        pks = refresh_visibility(Post.objects.filter(category=instance))
+        if pks:
+            post_changed.send(sender=Post, pks=pks)
+
+
+@receiver(pre_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    # Публикации удалённой категории остаются без категории (SET_NULL),
+    # обновление их поля category сигналов не отправляет.
+    visible = Post.objects.filter(category=instance, is_visible=True)
+    pks = list(visible.values_list('pk', flat=True))
+    if pks:
+        visible.update(is_visible=False)
+        post_changed.send(sender=Post, pks=pks, previous=dict.fromkeys(
+            pks, (instance.pk, True)))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields, **kwargs):
+    # Вход пользователя сохраняет только last_login.
+    negative_cache.users.saved(
+        instance.username, changed=update_fields is None
+        or 'username' in update_fields)
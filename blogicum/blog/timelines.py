@@ -0,0 +1,224 @@
+import time
+from bisect import insort
+
+from django.conf import settings
+from django.dispatch import receiver
+
+from core import tasks
+from core.locks import cache_lock
+from core.two_tier_cache import TwoTierCache
+
+from .models import Category, Post
+from .signals import post_changed
+
+TIMELINE_LENGTH: int = 1000
+TIMELINE_TIMEOUT: int = 3600
+# Изменение стольких публикаций сразу (например, снятие категории
+# с публикации) сбрасывает все ленты вместо поштучного обновления.
+TIMELINE_BULK_THRESHOLD: int = 100
+# Сколько секунд update ждёт, пока ленты обновляет другой процесс.
+TIMELINE_LOCK_WAIT: float = 5.0
+GENERATION_KEY = 'timeline:generation'
+LOCK_KEY = 'timeline:lock'
+ORDERING = ('-pub_date', '-pk')
+
+store = TwoTierCache('timelines')
+
+
+def get_generation():
+    # Поколение начинается со времени создания: после вытеснения ключа
+    # оно не вернётся к значению, под которым лежат старые списки.
+    return store.get_or_set(GENERATION_KEY, time.time_ns, None)
+
+
+def invalidate_all():
+    try:
+        store.incr(GENERATION_KEY)
+    except ValueError:
+        store.set(GENERATION_KEY, time.time_ns(), None)
+
+
+class Timeline:
+    """Упорядоченный список первичных ключей видимых публикаций ленты.
+
+    В кэше хранятся не более TIMELINE_LENGTH первых пар
+    (−timestamp pub_date, −pk) — всегда точное начало ленты —
+    и общее число публикаций; более дальние страницы читаются из БД.
+    """
+
+    def __init__(self, name, **filters):
+        self.name = name
+        self.filters = filters
+
+    def key(self, generation):
+        return f'timeline:{generation}:{self.name}'
+
+    def queryset(self):
+        return Post.objects.filter(is_visible=True, **self.filters)
+
+    def build(self):
+        queryset = self.queryset()
+        length = get_length()
+        rows = queryset.order_by(*ORDERING).values_list('pk', 'pub_date')
+        items = [(-pub_date.timestamp(), -pk)
+                 for pk, pub_date in rows[:length + 1]]
+        # Отдельный COUNT нужен, только если лента длиннее списка.
+        count = len(items) if len(items) <= length else queryset.count()
+        return {'items': items[:length], 'count': count}
+
+    def get(self):
+        key = self.key(get_generation())
+        entry = store.get(key)
+        if entry is None:
+            # Построенная лента сохраняется, только пока update
+            # не меняет ленты: иначе она затёрла бы его изменения.
+            with cache_lock(LOCK_KEY) as acquired:
+                entry = self.build()
+                if acquired:
+                    store.set(key, entry, get_timeout(), broadcast=False)
+        return entry
+
+    def matches(self, row):
+        return row is not None and row['is_visible'] and all(
+            row[name] == value for name, value in self.filters.items())
+
+    def apply(self, entry, rows, previous=None):
+        """Обновляет запись entry по новым состояниям публикаций rows
+        ({pk: строка или None для удалённых}); None — без изменений.
+
+        previous — прежние состояния ({pk: строка или None для новых});
+        по ним видно, могло ли измениться число публикаций ленты.
+        Для публикаций без прежнего состояния ленту приходится
+        пересчитывать.
+        """
+        previous = previous or {}
+        items = [item for item in entry['items'] if -item[1] not in rows]
+        changed = len(items) != len(entry['items'])
+        complete = entry['count'] == len(entry['items'])
+        recount = False
+        for pk, row in rows.items():
+            member = self.matches(row)
+            if pk not in previous or self.matches(previous[pk]) != member:
+                recount = changed = True
+            if not member:
+                continue
+            item = (-row['pub_date'].timestamp(), -pk)
+            # Публикации за пределами сохранённого начала ленты
+            # читаются из БД, в список их добавлять нельзя.
+            if complete or items and item < items[-1]:
+                insort(items, item)
+                changed = True
+        if not changed:
+            return None
+        if complete:
+            count = len(items)
+        elif recount:
+            count = self.queryset().count()
+        else:
+            count = entry['count']
+        return {'items': items[:get_length()], 'count': count}
+
+
+class TimelineSequence:
+    """Лента для Paginator: срезы берутся из списка ключей в кэше,
+    публикации загружаются функцией load по ключам."""
+
+    def __init__(self, timeline, load):
+        self.timeline = timeline
+        self.load = load
+        self.model = Post
+        self.entry = timeline.get()
+
+    def __len__(self):
+        return self.entry['count']
+
+    def __getitem__(self, index):
+        start, stop, _ = index.indices(len(self))
+        items = self.entry['items']
+        pks = [-pk for _, pk in items[start:stop]]
+        if stop > len(items):
+            pks.extend(self.timeline.queryset().order_by(
+                *ORDERING).values_list('pk', flat=True)[
+                max(start, len(items)):stop])
+        # Список может ненадолго отстать от БД: скрытые публикации
+        # отбрасываются.
+        return [post for post in self.load(pks) if post.is_visible]
+
+
+def get_length():
+    return getattr(settings, 'TIMELINE_LENGTH', TIMELINE_LENGTH)
+
+
+def get_timeout():
+    return getattr(settings, 'TIMELINE_TIMEOUT', TIMELINE_TIMEOUT)
+
+
+def index():
+    return Timeline('index')
+
+
+def category(category_id):
+    return Timeline(f'category:{category_id}', category_id=category_id)
+
+
+def feed(timeline, queryset, load):
+    """Лента для Paginator: при TIMELINES_ENABLED — срезы списка
+    timeline из кэша, публикации загружает load; иначе queryset
+    со связанными объектами."""
+    if getattr(settings, 'TIMELINES_ENABLED', False):
+        return TimelineSequence(timeline, load)
+    return load.prepare(queryset)
+
+
+@tasks.task(serial=True)
+def update(pks, previous=None):
+    """Применяет изменения публикаций pks ко всем лентам в кэше.
+
+    previous — прежние состояния публикаций списком
+    [pk, category_id, is_visible] (None вместо category_id
+    и is_visible — публикация только что создана).
+    """
+    if len(pks) > TIMELINE_BULK_THRESHOLD:
+        invalidate_all()
+        return
+    rows = dict.fromkeys(pks)
+    previous = {
+        pk: None if is_visible is None else {
+            'category_id': category_id, 'is_visible': is_visible}
+        for pk, category_id, is_visible in previous or ()}
+    # Записи лент читаются, изменяются и записываются обратно; без
+    # блокировки одновременные обновления затирали бы друг друга.
+    # Публикации читаются тоже под блокировкой: иначе обновление,
+    # дождавшееся своей очереди, применило бы устаревшее состояние.
+    with cache_lock(LOCK_KEY, getattr(settings, 'TIMELINE_LOCK_WAIT',
+                                      TIMELINE_LOCK_WAIT)) as acquired:
+        if not acquired:
+            # Новое поколение: ленты построятся заново из БД, а запись
+            # процесса, держащего блокировку, уйдёт в старые ключи.
+            invalidate_all()
+            return
+        for row in Post.objects.filter(pk__in=pks).values(
+                'pk', 'pub_date', 'category_id', 'is_visible'):
+            rows[row['pk']] = row
+        timelines = [index()] + [
+            category(category_id) for category_id in
+            Category.objects.values_list('pk', flat=True)]
+        generation = get_generation()
+        keys = {timeline.key(generation): timeline
+                for timeline in timelines}
+        updated = {}
+        # Изменяемые записи читаются из общего кэша: копия процесса
+        # может не знать об изменениях других процессов.
+        for key, entry in store.get_many(keys, local=False).items():
+            entry = keys[key].apply(entry, rows, previous)
+            if entry is not None:
+                updated[key] = entry
+        if updated:
+            store.set_many(updated, get_timeout())
+
+
+@receiver(post_changed, sender=Post)
+def post_changed_received(sender, pks, previous=None, **kwargs):
+    if getattr(settings, 'TIMELINES_ENABLED', False):
+        tasks.enqueue(update, list(pks), previous and [
+            [pk, *(state or (None, None))] for pk, state in previous.items()])
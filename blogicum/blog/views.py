@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.http.response import HttpResponseRedirect
 from django.shortcuts import get_object_or_404, redirect
 from django.utils import timezone
@@ -6,13 +7,15 @@ from django.views.generic import (DeleteView, DetailView, CreateView,
 from django.contrib.auth import get_user_model
 from django.urls import reverse_lazy
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.db.models import Count
 from django.http import Http404
 
-from .models import Post, Category, Comment
+from . import negative_cache, object_cache, scheduling, timelines
+from .models import Post, Comment
 from .forms import CustomUserForm, CommentForm, PostForm
 
 POST_PER_PAGE: int = 10
+PAGES_ON_EACH_SIDE: int = 2
+PAGES_ON_ENDS: int = 1
 
 User = get_user_model()
 
@@ -22,26 +25,54 @@ class CommentSuccessUrlMixin:
         return reverse_lazy('blog:post_detail', args=[self.object.post.pk])
 
 
-class IndexListView(ListView):
+class TemplateEngineMixin:
+    """Выбирает движок шаблонов по имени маршрута
+    из settings.BLOG_TEMPLATE_ENGINES."""
+
+    @property
+    def template_engine(self):
+        match = self.request.resolver_match
+        return getattr(settings, 'BLOG_TEMPLATE_ENGINES', {}).get(
+            match and match.view_name)
+
+
+class ElidedPaginationMixin:
+    """Передаёт в шаблон page_range — номера страниц вокруг текущей,
+    первые и последние, с многоточием вместо пропусков."""
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = context.get('page_obj')
+        if page is not None:
+            context['page_range'] = list(
+                page.paginator.get_elided_page_range(
+                    page.number, on_each_side=PAGES_ON_EACH_SIDE,
+                    on_ends=PAGES_ON_ENDS))
+        return context
+
+
+class IndexListView(TemplateEngineMixin, ElidedPaginationMixin, ListView):
     paginate_by = POST_PER_PAGE
     template_name = 'blog/index.html'
 
     def get_queryset(self):
-        return Post.objects.filter(
-            pub_date__lte=timezone.now(),
-            is_published=True,
-            category__is_published=True
-        ).annotate(comment_count=Count('comments')).order_by('-pub_date')
+        scheduling.release_due()
+        queryset = Post.objects.filter(is_visible=True).order_by('-pub_date')
+        return timelines.feed(timelines.index(), queryset,
+                              object_cache.PostLoader(comment_count=True))
 
 
-class PostDetailView(UserPassesTestMixin, DetailView):
+class PostDetailView(TemplateEngineMixin, UserPassesTestMixin, DetailView):
     template_name = 'blog/detail.html'
     model = Post
     pk_url_kwarg = 'id'
 
     def test_func(self):
-        self.object = get_object_or_404(self.model,
-                                        pk=self.kwargs[self.pk_url_kwarg])
+        pk = self.kwargs[self.pk_url_kwarg]
+        negative_cache.posts.check(pk)
+        self.object = object_cache.get_post(pk)
+        if self.object is None:
+            negative_cache.posts.missing(pk)
         return (self.object.author == self.request.user
                 or (self.object.is_published
                     and self.object.category.is_published
@@ -50,31 +81,41 @@ class PostDetailView(UserPassesTestMixin, DetailView):
     def handle_no_permission(self):
         raise Http404("This post is not available.")
 
+    def get_object(self, queryset=None):
+        return self.object
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['comments'] = Comment.objects.filter(
-            post=context['post']).order_by('created_at')
+            post=context['post']).select_related('author').order_by(
+                'created_at')
         context['form'] = CommentForm()
 
         return context
 
 
-class CategoryPostsListView(ListView):
+class CategoryPostsListView(TemplateEngineMixin, ElidedPaginationMixin,
+                            ListView):
     paginate_by = POST_PER_PAGE
     template_name = 'blog/category.html'
     model = Post
 
     def get_queryset(self, **kwargs):
         category_slug = self.kwargs['category_slug']
-        self.category = get_object_or_404(Category,
-                                          slug=category_slug,
-                                          is_published=True)
-
-        return Post.objects.filter(
+        negative_cache.categories.check(category_slug)
+        self.category = object_cache.categories.get_by('slug', category_slug)
+        if self.category is None:
+            negative_cache.categories.missing(category_slug)
+        if not self.category.is_published:
+            raise Http404
+
+        scheduling.release_due()
+        queryset = Post.objects.filter(
             category=self.category,
-            is_published=True,
-            pub_date__lte=timezone.now()
+            is_visible=True
         ).order_by("-pub_date")
+        return timelines.feed(timelines.category(self.category.pk),
+                              queryset, object_cache.PostLoader())
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -82,24 +123,28 @@ class CategoryPostsListView(ListView):
         return context
 
 
-class ProfileListView(ListView):
+class ProfileListView(TemplateEngineMixin, ElidedPaginationMixin,
+                      ListView):
     template_name = 'blog/profile.html'
     model = Post
     paginate_by = POST_PER_PAGE
 
     def get_queryset(self):
-        user = get_object_or_404(User, username=self.kwargs['username'])
-        return Post.objects.filter(author=user).annotate(
-            comment_count=Count('comments')).order_by("-pub_date")
+        username = self.kwargs['username']
+        negative_cache.users.check(username)
+        self.profile = object_cache.users.get_by('username', username)
+        if self.profile is None:
+            negative_cache.users.missing(username)
+        return object_cache.PostLoader(comment_count=True).prepare(
+            Post.objects.filter(author=self.profile).order_by("-pub_date"))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['profile'] = get_object_or_404(
-            User, username=self.kwargs['username'])
+        context['profile'] = self.profile
         return context
 
 
-class EditProfileListView(UpdateView):
+class EditProfileListView(TemplateEngineMixin, UpdateView):
     model = User
     template_name = 'blog/user.html'
     form_class = CustomUserForm
@@ -112,7 +157,7 @@ class EditProfileListView(UpdateView):
             'username': self.request.user.username})
 
 
-class PostCreateView(LoginRequiredMixin, CreateView):
+class PostCreateView(LoginRequiredMixin, TemplateEngineMixin, CreateView):
     model = Post
     form_class = PostForm
     template_name = 'blog/create.html'
@@ -129,7 +174,8 @@ class PostCreateView(LoginRequiredMixin, CreateView):
             'username': self.request.user.username})
 
 
-class EditPostView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class EditPostView(LoginRequiredMixin, UserPassesTestMixin,
+                   TemplateEngineMixin, UpdateView):
     model = Post
     template_name = 'blog/create.html'
     form_class = PostForm
@@ -150,7 +196,7 @@ class EditPostView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
         return reverse_lazy('blog:post_detail', args=[self.object.pk])
 
 
-class DeletePostView(LoginRequiredMixin, DeleteView):
+class DeletePostView(LoginRequiredMixin, TemplateEngineMixin, DeleteView):
     model = Post
     template_name = 'blog/create.html'
 
@@ -181,7 +227,7 @@ class CommentCreateView(LoginRequiredMixin, CommentSuccessUrlMixin,
 
 
 class CommentUpdateView(LoginRequiredMixin, CommentSuccessUrlMixin,
-                        UpdateView):
+                        TemplateEngineMixin, UpdateView):
     model = Comment
     form_class = CommentForm
     template_name = 'blog/comment.html'
@@ -194,7 +240,8 @@ class CommentUpdateView(LoginRequiredMixin, CommentSuccessUrlMixin,
         return comment
 
 
-class CommentDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class CommentDeleteView(LoginRequiredMixin, UserPassesTestMixin,
+                        TemplateEngineMixin, DeleteView):
     model = Comment
     template_name = 'blog/comment.html'
     pk_url_kwarg = 'comment_id'
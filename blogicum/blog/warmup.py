@@ -0,0 +1,87 @@
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models import Count, Q
+from django.test.client import Client
+from django.urls import reverse
+
+from .models import Category, Post
+from .views import POST_PER_PAGE
+
+User = get_user_model()
+
+WARMUP_PAGES: int = 5
+WARMUP_AUTHORS: int = 20
+WARMUP_POSTS: int = 50
+WARMUP_THREADS: int = 4
+# Заголовок браузера: в кэше оказывается тот же сжатый вариант,
+# который запросят посетители.
+WARMUP_ACCEPT_ENCODING = 'gzip, deflate, br'
+
+
+def iter_urls(pages=WARMUP_PAGES, authors=WARMUP_AUTHORS,
+              posts=WARMUP_POSTS):
+    """Адреса для прогрева: первые pages страниц главной, все
+    опубликованные категории, профили authors авторов с наибольшим
+    числом видимых публикаций и posts самых обсуждаемых публикаций."""
+    index = reverse('blog:index')
+    visible = Post.objects.filter(is_visible=True)
+    pages = min(pages, math.ceil(visible.count() / POST_PER_PAGE))
+    yield index
+    for page in range(2, pages + 1):
+        yield f'{index}?page={page}'
+    for slug in Category.objects.filter(is_published=True).order_by(
+            'slug').values_list('slug', flat=True):
+        yield reverse('blog:category_posts', args=[slug])
+    for username in User.objects.annotate(
+            visible_posts=Count('post', filter=Q(post__is_visible=True)),
+    ).filter(visible_posts__gt=0).order_by(
+            '-visible_posts', 'pk').values_list('username', flat=True)[
+            :authors]:
+        yield reverse('blog:profile', args=[username])
+    for pk in visible.annotate(
+            comments_count=Count('comments'),
+    ).order_by('-comments_count', '-pub_date').values_list(
+            'pk', flat=True)[:posts]:
+        yield reverse('blog:post_detail', args=[pk])
+
+
+def make_client():
+    return Client(SERVER_NAME='localhost', raise_request_exception=False)
+
+
+def fetch(client, url):
+    started = time.perf_counter()
+    response = client.get(url, HTTP_ACCEPT_ENCODING=WARMUP_ACCEPT_ENCODING)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return {'url': url, 'status': response.status_code,
+            'ms': round((time.perf_counter() - started) * 1000, 1)}
+
+
+def warm(urls, threads=WARMUP_THREADS):
+    """Запрашивает urls анонимно в threads потоках; возвращает
+    для каждого адреса код ответа и время в миллисекундах.
+
+    Запросы проходят через весь стек middleware в этом же процессе;
+    остальным процессам прогрев полезен, только если кэш общий
+    (см. core.two_tier_cache.is_shared).
+    """
+    urls = list(urls)
+    if threads <= 1:
+        client = make_client()
+        return [fetch(client, url) for url in urls]
+
+    def worker(url):
+        # Client не потокобезопасен, а соединения с БД у каждого
+        # потока свои и закрываются после запроса.
+        try:
+            return fetch(make_client(), url)
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(worker, urls))
@@ -0,0 +1,31 @@
+from django.template import defaultfilters
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.timezone import template_localtime
+from django_bootstrap5.templatetags.django_bootstrap5 import (
+    bootstrap_button, bootstrap_form)
+from jinja2 import Environment
+
+
+def url(view_name, *args, **kwargs):
+    return reverse(view_name, args=args or None, kwargs=kwargs or None)
+
+
+def date(value, arg=None):
+    return defaultfilters.date(template_localtime(value), arg)
+
+
+def environment(**options):
+    """Окружение Jinja2 с функциями и фильтрами шаблонов Django,
+    которые используют шаблоны блога."""
+    env = Environment(**options)
+    env.globals.update({
+        'url': url,
+        'static': static,
+        'bootstrap_form': bootstrap_form,
+        'bootstrap_button': bootstrap_button,
+    })
+    env.filters.update({
+        'date': date,
+    })
+    return env
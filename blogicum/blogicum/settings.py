@@ -1,3 +1,5 @@
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -14,6 +16,7 @@ ALLOWED_HOSTS = [
 INSTALLED_APPS = [
     'blog.apps.BlogConfig',
     'pages.apps.PagesConfig',
+    'core.apps.CoreConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -24,6 +27,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.QueryInspectorMiddleware',
+    'core.middleware.SlowQueryLogMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -37,11 +46,15 @@ ROOT_URLCONF = 'blogicum.urls'
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -49,10 +62,33 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            'loaders': TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ],
         },
     },
 ]
 
+# Jinja2 подключается, только если пакет установлен; шаблоны блога
+# для него лежат в каталоге jinja2 и выбираются по именам маршрутов
+# в BLOG_TEMPLATE_ENGINES, например {'blog:index': 'jinja2'}.
+if find_spec('jinja2'):
+    TEMPLATES.append({
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [BASE_DIR / 'jinja2'],
+        'OPTIONS': {
+            'environment': 'blogicum.jinja2.environment',
+            'context_processors': [
+                'django.contrib.auth.context_processors.auth',
+            ],
+        },
+    })
+
+BLOG_TEMPLATE_ENGINES = {}
+
+# Компилировать все шаблоны при старте WSGI-приложения.
+TEMPLATE_WARMUP = not DEBUG
+
 WSGI_APPLICATION = 'blogicum.wsgi.application'
 
 DATABASES = {
@@ -62,6 +98,34 @@ DATABASES = {
     }
 }
 
+# Ленты, кэш объектов и сброс кэшей процессов (LOCAL_CACHE_ENABLED)
+# работают, только если кэш общий для всех процессов: веб-сервера,
+# run_worker и warm_cache. LocMemCache у каждого процесса свой и годится
+# только для разработки и тестов; в production — memcached, если
+# установлен пакет pymemcache, иначе кэш в файлах.
+if DEBUG:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+elif find_spec('pymemcache'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': os.getenv('MEMCACHED_LOCATION', '127.0.0.1:11211'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': BASE_DIR / 'cache',
+            'OPTIONS': {'MAX_ENTRIES': 100000},
+        }
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -91,6 +155,97 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [BASE_DIR / 'project_static', ]
 
+STATIC_ROOT = BASE_DIR / 'static'
+
+# В production collectstatic добавляет хэш в имена файлов, удаляет
+# из CSS неиспользуемые правила и сохраняет сжатые варианты.
+if not DEBUG:
+    STATICFILES_STORAGE = (
+        'core.staticfiles.CompressedManifestStaticFilesStorage')
+
+STATIC_PURGE_CSS = ['css/bootstrap.min.css']
+
+# Кроме шаблонов, классы CSS ищутся в коде django_bootstrap5:
+# он формирует разметку форм и кнопок.
+STATIC_PURGE_SOURCES = [
+    find_spec('django_bootstrap5').submodule_search_locations[0],
+]
+
+STATIC_PURGE_SAFELIST = []
+
+# Раздавать статику из STATIC_ROOT средствами Django.
+STATIC_SERVE = not DEBUG
+
+# Хранить готовые байты статических страниц и страниц ошибок в кэше.
+PAGE_CACHE_ENABLED = not DEBUG
+
+PAGE_CACHE_TIMEOUT = None
+
+PAGE_CACHE_USER_TIMEOUT = 600
+
+# Сжимать HTML и другие текстовые ответы (Brotli, если установлен
+# пакет brotli, иначе gzip); сжатые варианты одинаковых ответов
+# хранить в кэше.
+COMPRESSION_ENABLED = True
+
+COMPRESSION_GZIP_LEVEL = 6
+
+COMPRESSION_BROTLI_QUALITY = 5
+
+COMPRESSION_CACHE_ENABLED = PAGE_CACHE_ENABLED
+
+COMPRESSION_CACHE_TIMEOUT = 300
+
+# Как часто процесс проверяет БД на новые отложенные публикации,
+# если не запущен publish_scheduled --loop.
+SCHEDULE_CHECK_INTERVAL = 60
+
+# Хранить в кэше упорядоченные списки публикаций главной страницы
+# и страниц категорий и обновлять их при изменении публикаций.
+TIMELINES_ENABLED = not DEBUG
+
+TIMELINE_LENGTH = 1000
+
+TIMELINE_TIMEOUT = 3600
+
+# Хранить в кэше публикации, пользователей, категории и местоположения
+# по первичному ключу; ленты и страницы публикаций загружают их
+# пакетно.
+OBJECT_CACHE_ENABLED = not DEBUG
+
+OBJECT_CACHE_TIMEOUT = 3600
+
+# Отвечать 404 на запросы к несуществующим публикациям, категориям
+# и профилям без обращения к БД (фильтр Блума и кэш промахов).
+NEGATIVE_CACHE_ENABLED = not DEBUG
+
+NEGATIVE_CACHE_TIMEOUT = 300
+
+BLOOM_REBUILD_INTERVAL = 600
+
+BLOOM_MAX_BYTES = 900 * 1024
+
+# Держать прочитанные из кэша объекты, ленты и отметки промахов
+# в памяти процесса (LRU); об изменениях в других процессах процесс
+# узнаёт не позже чем через LOCAL_CACHE_CHECK_INTERVAL секунд.
+LOCAL_CACHE_ENABLED = not DEBUG
+
+LOCAL_CACHE_SIZE = 10000
+
+LOCAL_CACHE_TIMEOUT = 60
+
+LOCAL_CACHE_CHECK_INTERVAL = 1.0
+
+# Выполнять задачи фоновой очереди (core.tasks) сразу в процессе
+# запроса; иначе их выполняет manage.py run_worker.
+TASKS_EAGER = DEBUG
+
+TASK_MAX_ATTEMPTS = 5
+
+TASK_RETRY_DELAY = 10
+
+TASK_VISIBILITY_TIMEOUT = 300
+
 MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -107,3 +262,79 @@ CSRF_FAILURE_VIEW = 'pages.views.csrf_failure'
 LOGIN_REDIRECT_URL = 'blog:index'
 
 LOGIN_URL = 'login'
+
+
+SERVER_TIMING_ENABLED = True
+
+SERVER_TIMING_SAMPLE_RATE = 1.0 if DEBUG else 0.1
+
+SERVER_TIMING_TEMPLATES = 5
+
+
+METRICS_ENABLED = True
+
+METRICS_DIR = BASE_DIR / 'metrics'
+
+# Токен для заголовка Authorization: Bearer при запросе /metrics/;
+# пустой — эндпоинт отключён.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+
+QUERY_INSPECTOR_ENABLED = DEBUG
+
+N_PLUS_ONE_THRESHOLD = 3
+
+QUERY_BUDGETS = {
+    'blog:index': 5,
+    'blog:category_posts': 6,
+    'blog:profile': 7,
+    'blog:post_detail': 6,
+}
+
+
+SLOW_QUERY_LOG_ENABLED = True
+
+SLOW_QUERY_THRESHOLD_MS = 100
+
+SLOW_QUERY_LOG_FILE = BASE_DIR / 'logs' / 'slow_queries.log'
+
+
+PROFILING_ENABLED = False
+
+PROFILING_EVERY_N = 1000
+
+PROFILING_TOKEN = os.getenv('PROFILING_TOKEN', '')
+
+PROFILING_DIR = BASE_DIR / 'profiles'
+
+PROFILING_MAX_BYTES = 100 * 1024 * 1024
+
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+        'slow_queries': {
+            'class': 'core.log_handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG_FILE,
+            'maxBytes': 5 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'blogicum': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'blogicum.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
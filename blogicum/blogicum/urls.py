@@ -1,8 +1,11 @@
-from django.urls import include, path, reverse_lazy
+from django.conf import settings
+from django.urls import include, path, re_path, reverse_lazy
 from django.contrib import admin
 from django.contrib.auth.forms import UserCreationForm
 from django.views.generic.edit import CreateView
 
+from core.views import static_file
+
 handler404 = 'pages.views.page_not_found'
 handler500 = 'pages.views.server_error'
 
@@ -10,6 +13,7 @@ urlpatterns = [
     path('pages/', include('pages.urls')),
     path('', include('blog.urls')),
     path('admin/', admin.site.urls),
+    path('metrics/', include('core.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('auth/registration/', CreateView.as_view(
         template_name='registration/registration_form.html',
@@ -17,3 +21,9 @@ urlpatterns = [
         success_url=reverse_lazy('blog:index'),),
         name='registration'),
 ]
+
+if settings.STATIC_SERVE:
+    urlpatterns += [
+        re_path(rf'^{settings.STATIC_URL.strip("/")}/(?P<path>.+)$',
+                static_file),
+    ]
@@ -0,0 +1,200 @@
+import json
+import statistics
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, F
+from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from blog.models import Comment
+
+from .compression import brotli, compress
+from .template_timing import collect_templates
+
+BENCHMARK_URLCONFS = ('blog.urls', 'pages.urls')
+BENCHMARK_REQUESTS: int = 20
+BENCHMARK_WARMUP: int = 2
+BENCHMARK_COMPRESSION = (('gzip', 1), ('gzip', 6), ('gzip', 9),
+                         ('br', 1), ('br', 5), ('br', 11))
+BENCHMARK_COMPRESSION_REPEAT: int = 5
+DEFAULT_THRESHOLDS = {
+    'p50_ms': 0.25,
+    'p95_ms': 0.5,
+    'queries': 0,
+    'bytes': 0.1,
+}
+# Минимальный абсолютный рост задержки, который считается регрессией:
+# на быстрых страницах относительный порог меньше шума измерений.
+MIN_LATENCY_DELTA_MS = {
+    'p50_ms': 2.0,
+    'p95_ms': 5.0,
+}
+
+
+def get_thresholds():
+    return {**DEFAULT_THRESHOLDS,
+            **getattr(settings, 'BENCHMARK_THRESHOLDS', {})}
+
+
+def iter_view_names():
+    for urlconf in BENCHMARK_URLCONFS:
+        module = import_module(urlconf)
+        for pattern in module.urlpatterns:
+            if isinstance(pattern, URLPattern) and pattern.name:
+                yield (f'{module.app_name}:{pattern.name}',
+                       tuple(pattern.pattern.regex.groupindex))
+
+
+def get_sample(comment=None):
+    """Подбирает объекты для подстановки в параметры маршрутов.
+
+    Берётся комментарий автора к самой обсуждаемой из его видимых
+    публикаций, чтобы страница публикации была полной, а страницы
+    редактирования открывались от имени автора.
+    """
+    comment = comment or Comment.objects.filter(
+        author=F('post__author'),
+        post__is_published=True,
+        post__category__is_published=True,
+        post__pub_date__lte=timezone.now(),
+    ).annotate(
+        post_comments=Count('post__comments')
+    ).select_related('post__category', 'author').order_by(
+        '-post_comments', 'pk').first()
+    if comment is None:
+        return None
+    return {
+        'user': comment.author,
+        'kwargs': {
+            'id': comment.post_id,
+            'post_id': comment.post_id,
+            'comment_id': comment.pk,
+            'category_slug': comment.post.category.slug,
+            'username': comment.author.username,
+        },
+    }
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def compression_costs(content, repeat=BENCHMARK_COMPRESSION_REPEAT):
+    """Размер и время сжатия ответа для каждого алгоритма и уровня
+    из BENCHMARK_COMPRESSION; saved — доля сэкономленных байтов."""
+    costs = {}
+    for encoding, level in BENCHMARK_COMPRESSION:
+        if encoding == 'br' and brotli is None:
+            continue
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            compressed = compress(encoding, content, level)
+            timings.append((time.perf_counter() - started) * 1000)
+        costs[f'{encoding}-{level}'] = {
+            'bytes': len(compressed),
+            'saved': round(1 - len(compressed) / max(len(content), 1), 3),
+            'ms': round(statistics.median(timings), 3),
+        }
+    return costs
+
+
+def measure(client, url, requests=BENCHMARK_REQUESTS,
+            warmup=BENCHMARK_WARMUP, compression=False):
+    for _ in range(warmup):
+        client.get(url)
+    timings = []
+    queries = []
+    templates = {}
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as context, \
+                collect_templates() as rendered:
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(context.captured_queries))
+        for name, row in rendered.as_dict().items():
+            total = templates.setdefault(name, {'count': 0, 'own_ms': 0.0})
+            total['count'] += row['count']
+            total['own_ms'] += row['own_ms']
+    result = {
+        'url': url,
+        'status': response.status_code,
+        'p50_ms': round(percentile(timings, 0.5), 3),
+        'p90_ms': round(percentile(timings, 0.9), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'queries': max(queries),
+        'bytes': len(response.content),
+        'templates': {
+            name: {'count': row['count'] / requests,
+                   'own_ms': round(row['own_ms'] / requests, 3)}
+            for name, row in sorted(templates.items(),
+                                    key=lambda item: -item[1]['own_ms'])
+        },
+    }
+    if compression:
+        result['compression'] = compression_costs(response.content)
+    return result
+
+
+def run(sample, requests=BENCHMARK_REQUESTS, warmup=BENCHMARK_WARMUP,
+        only=None, compression=False):
+    anonymous = Client(raise_request_exception=False)
+    logged_in = Client(raise_request_exception=False)
+    logged_in.force_login(sample['user'])
+    results = {}
+    for view_name, params in iter_view_names():
+        if only and view_name not in only:
+            continue
+        url = reverse(view_name,
+                      kwargs={name: sample['kwargs'][name]
+                              for name in params})
+        for variant, client in (('anonymous', anonymous),
+                                ('logged_in', logged_in)):
+            results[f'{view_name}|{variant}'] = measure(
+                client, url, requests, warmup, compression)
+    return results
+
+
+def compare(results, baseline, thresholds=None):
+    """Возвращает описания регрессий относительно базовых результатов.
+
+    Порог — допустимый относительный рост метрики: 0.25 означает,
+    что значение может превысить базовое не более чем на 25%.
+    """
+    thresholds = thresholds or get_thresholds()
+    regressions = []
+    for key, base in baseline.items():
+        current = results.get(key)
+        if current is None:
+            continue
+        if current['status'] != base['status']:
+            regressions.append(
+                f'{key}: статус {current["status"]} (база {base["status"]})')
+        for metric, threshold in thresholds.items():
+            limit = max(base[metric] * (1 + threshold),
+                        base[metric] + MIN_LATENCY_DELTA_MS.get(metric, 0))
+            if current[metric] > limit:
+                regressions.append(
+                    f'{key}: {metric} {current[metric]} > {limit:g} '
+                    f'(база {base[metric]})')
+    return regressions
+
+
+def dump(results, path, meta=None):
+    with open(path, 'w') as stream:
+        json.dump({'meta': meta or {}, 'results': results}, stream,
+                  indent=2, ensure_ascii=False, sort_keys=True)
+
+
+def load(path):
+    with open(path) as stream:
+        return json.load(stream)['results']
@@ -0,0 +1,48 @@
+import hashlib
+import math
+
+BLOOM_ERROR_RATE: float = 0.01
+
+
+class BloomFilter:
+    """Множество с ложноположительными, но без ложноотрицательных ответов.
+
+    Позиции битов вычисляются двойным хэшированием одного дайджеста
+    blake2b. max_size ограничивает число битов: фильтр, не влезающий
+    в запись кэша, даёт больше ложноположительных ответов, но остаётся
+    верным.
+    """
+
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE,
+                 max_size=None):
+        capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2))
+        if max_size is not None:
+            self.size = max(8, min(self.size, max_size))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, value):
+        digest = hashlib.blake2b(str(value).encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + index * second) % self.size
+                for index in range(self.hashes))
+
+    def add(self, value):
+        for position in self.positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self.positions(value))
+
+    def __getstate__(self):
+        return {'size': self.size, 'hashes': self.hashes,
+                'bits': bytes(self.bits)}
+
+    def __setstate__(self, state):
+        self.size = state['size']
+        self.hashes = state['hashes']
+        self.bits = bytearray(state['bits'])
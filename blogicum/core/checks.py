@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from .templates import compile_templates
+from .two_tier_cache import is_local_enabled, is_shared
+
+
+@register(Tags.templates)
+def check_template_syntax(app_configs, **kwargs):
+    return [
+        Error(f'Синтаксическая ошибка в шаблоне {name}: {error}',
+              id='core.E001')
+        for name, error in compile_templates()
+    ]
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    errors = []
+    if is_local_enabled() and not is_shared():
+        errors.append(Error(
+            'LOCAL_CACHE_ENABLED требует кэша, общего для всех процессов: '
+            'с LocMemCache сброс кэшей процессов не доходит до других '
+            'процессов.',
+            hint='Настройте в CACHES memcached или FileBasedCache.',
+            id='core.E002'))
+    if (getattr(settings, 'TIMELINES_ENABLED', False)
+            and not getattr(settings, 'TASKS_EAGER', False)
+            and not is_shared()):
+        errors.append(Error(
+            'Ленты обновляет run_worker (TASKS_EAGER = False), а кэш '
+            'по умолчанию — LocMemCache: исполнитель обновит только свою '
+            'память, и веб-процессы не увидят изменений публикаций.',
+            hint='Настройте в CACHES общий кэш или включите TASKS_EAGER.',
+            id='core.E003'))
+    return errors
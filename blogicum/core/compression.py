@@ -0,0 +1,123 @@
+import gzip
+import hashlib
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .metrics import register_cache_stats
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_GZIP_LEVEL: int = 6
+COMPRESSION_BROTLI_QUALITY: int = 5
+COMPRESSION_CACHE_PREFIX = 'compressed'
+COMPRESSION_CACHE_TIMEOUT: int = 300
+
+stats = {'hits': 0, 'misses': 0}
+register_cache_stats('compressed', lambda: dict(stats))
+
+
+def accepted_encodings(request):
+    """Кодировки из Accept-Encoding, кроме явно запрещённых (q=0)."""
+    encodings = set()
+    for part in request.headers.get('Accept-Encoding', '').split(','):
+        name, _, quality = part.replace(' ', '').partition(';q=')
+        try:
+            if quality and float(quality) == 0:
+                continue
+        except ValueError:
+            continue
+        encodings.add(name.lower())
+    return encodings
+
+
+def choose_encoding(request):
+    """Brotli, если он установлен и поддерживается клиентом, иначе gzip."""
+    encodings = accepted_encodings(request)
+    if brotli is not None and 'br' in encodings:
+        return 'br'
+    if 'gzip' in encodings:
+        return 'gzip'
+    return None
+
+
+def get_level(encoding):
+    if encoding == 'br':
+        return getattr(settings, 'COMPRESSION_BROTLI_QUALITY',
+                       COMPRESSION_BROTLI_QUALITY)
+    return getattr(settings, 'COMPRESSION_GZIP_LEVEL',
+                   COMPRESSION_GZIP_LEVEL)
+
+
+def compress(encoding, data, level=None):
+    level = get_level(encoding) if level is None else level
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def is_shared(request, response):
+    """Ответ одинаков для всех посетителей: запрос анонимный, ответ
+    не ставит cookie и не помечен как private или no-store.
+
+    Ответы авторизованным пользователям содержат CSRF-токен и почти
+    всегда уникальны: кэшировать их сжатие бесполезно, а записи
+    вытесняли бы из кэша объекты и ленты блога.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return False
+    if response.cookies:
+        return False
+    cache_control = response.get('Cache-Control', '').lower()
+    return 'private' not in cache_control and (
+        'no-store' not in cache_control)
+
+
+def compress_cached(encoding, data):
+    """Сжимает data, сохраняя результат в кэше по дайджесту содержимого.
+
+    Одинаковые ответы (например, лента для анонимных посетителей)
+    сжимаются один раз. Включается настройкой COMPRESSION_CACHE_ENABLED.
+    """
+    if not getattr(settings, 'COMPRESSION_CACHE_ENABLED', False):
+        return compress(encoding, data)
+    level = get_level(encoding)
+    key = ':'.join((COMPRESSION_CACHE_PREFIX, encoding, str(level),
+                    hashlib.sha1(data).hexdigest()))
+    compressed = cache.get(key)
+    if compressed is None:
+        stats['misses'] += 1
+        compressed = compress(encoding, data, level)
+        cache.set(key, compressed, getattr(
+            settings, 'COMPRESSION_CACHE_TIMEOUT', COMPRESSION_CACHE_TIMEOUT))
+    else:
+        stats['hits'] += 1
+    return compressed
+
+
+def compress_stream(encoding, chunks):
+    """Сжимает потоковый ответ по частям.
+
+    После каждой части выполняется flush, чтобы клиент получал данные
+    сразу, а не после накопления полного блока компрессора.
+    """
+    level = get_level(encoding)
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
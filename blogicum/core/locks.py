@@ -0,0 +1,29 @@
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+LOCK_TIMEOUT: int = 60
+LOCK_RETRY_INTERVAL: float = 0.05
+
+
+@contextmanager
+def cache_lock(key, wait=0.0, timeout=LOCK_TIMEOUT):
+    """Блокировка key в общем кэше для всех процессов.
+
+    Ждёт освобождения не дольше wait секунд и возвращает, получена ли
+    блокировка. Блокировка упавшего процесса истекает через timeout
+    секунд; снимается она, только если её ещё держит этот владелец.
+    """
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + wait
+    acquired = cache.add(key, token, timeout)
+    while not acquired and time.monotonic() < deadline:
+        time.sleep(LOCK_RETRY_INTERVAL)
+        acquired = cache.add(key, token, timeout)
+    try:
+        yield acquired
+    finally:
+        if acquired and cache.get(key) == token:
+            cache.delete(key)
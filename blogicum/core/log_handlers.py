@@ -0,0 +1,10 @@
+import logging.handlers
+from pathlib import Path
+
+
+class RotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler, создающий каталог лога при первой записи."""
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
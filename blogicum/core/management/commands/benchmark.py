@@ -0,0 +1,118 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (override_settings, setup_test_environment,
+                               teardown_test_environment)
+from django.utils import timezone
+
+from blog.models import Post
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = ('Измеряет задержку, число запросов к БД и размер ответа '
+            'для всех страниц blog и pages на отдельной базе '
+            'с синтетическими данными.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--comments', type=int, default=300000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--database',
+                            default=str(settings.BASE_DIR
+                                        / 'benchmark.sqlite3'),
+                            help='Файл базы для замеров.')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Сохранить базу с данными для повторных '
+                                 'запусков.')
+        parser.add_argument('--requests', type=int,
+                            default=benchmark.BENCHMARK_REQUESTS)
+        parser.add_argument('--warmup', type=int,
+                            default=benchmark.BENCHMARK_WARMUP)
+        parser.add_argument('--view', action='append', dest='views',
+                            help='Имя маршрута, например blog:index; '
+                                 'можно указать несколько раз.')
+        parser.add_argument('--output', default='benchmark.json')
+        parser.add_argument('--baseline',
+                            help='JSON с базовыми результатами; при '
+                                 'регрессии команда завершается ошибкой.')
+        parser.add_argument('--template-engine',
+                            help='Движок шаблонов для всех страниц блога '
+                                 '(см. BLOG_TEMPLATE_ENGINES).')
+        parser.add_argument('--templates', type=int, default=0,
+                            help='Показать для каждой страницы столько '
+                                 'самых затратных шаблонов.')
+        parser.add_argument('--compression', action='store_true',
+                            help='Измерить размер и время сжатия ответов '
+                                 'gzip и Brotli на разных уровнях.')
+        parser.add_argument('--threshold', type=float,
+                            help='Допустимый относительный рост '
+                                 'задержки p50 и p95.')
+
+    def handle(self, *args, **options):
+        results = self.run_on_test_database(options)
+        benchmark.dump(results, options['output'], meta={
+            'created_at': timezone.now().isoformat(),
+            'posts': options['posts'],
+            'requests': options['requests'],
+            'template_engine': options['template_engine'],
+        })
+        for key, row in sorted(results.items()):
+            self.stdout.write(
+                f'{key:<40} {row["status"]} p50={row["p50_ms"]}ms '
+                f'p95={row["p95_ms"]}ms queries={row["queries"]} '
+                f'bytes={row["bytes"]}')
+            for name, template in list(
+                    row['templates'].items())[:options['templates']]:
+                self.stdout.write(
+                    f'    {name:<36} ×{template["count"]:g} '
+                    f'{template["own_ms"]}ms')
+            for name, cost in row.get('compression', {}).items():
+                self.stdout.write(
+                    f'    {name:<36} bytes={cost["bytes"]} '
+                    f'saved={cost["saved"]:.0%} {cost["ms"]}ms')
+        if options['baseline']:
+            self.check_baseline(results, options)
+
+    def run_on_test_database(self, options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.settings_dict['TEST']['NAME'] = options['database']
+        connection.creation.create_test_db(verbosity=0,
+                                           keepdb=options['keepdb'])
+        try:
+            if not Post.objects.exists():
+                call_command('seed_blog', users=options['users'],
+                             posts=options['posts'],
+                             comments=options['comments'],
+                             seed=options['seed'], stdout=self.stdout)
+            sample = benchmark.get_sample()
+            if sample is None:
+                raise CommandError('Нет данных для замеров.')
+            engines = {
+                view_name: options['template_engine']
+                for view_name, _ in benchmark.iter_view_names()
+            } if options['template_engine'] else {}
+            with override_settings(DEBUG=False,
+                                   BLOG_TEMPLATE_ENGINES=engines):
+                return benchmark.run(sample, options['requests'],
+                                     options['warmup'], options['views'],
+                                     options['compression'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0,
+                                                keepdb=options['keepdb'])
+            teardown_test_environment()
+
+    def check_baseline(self, results, options):
+        thresholds = benchmark.get_thresholds()
+        if options['threshold'] is not None:
+            thresholds['p50_ms'] = thresholds['p95_ms'] = options[
+                'threshold']
+        regressions = benchmark.compare(
+            results, benchmark.load(options['baseline']), thresholds)
+        if regressions:
+            raise CommandError('Регрессия производительности:\n'
+                               + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Регрессий не найдено.'))
@@ -0,0 +1,49 @@
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import tasks
+
+WORKER_POLL_INTERVAL: float = 1.0
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задачи фоновой очереди (core.tasks).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=1,
+                            help='Число потоков; задачи с serial=True '
+                                 'всё равно выполняются по одной.')
+        parser.add_argument('--poll-interval', type=float,
+                            default=WORKER_POLL_INTERVAL,
+                            help='Пауза между опросами пустой очереди, '
+                                 'секунд.')
+        parser.add_argument('--once', action='store_true',
+                            help='Выполнить готовые задачи и завершиться.')
+
+    def handle(self, *args, **options):
+        stopping = threading.Event()
+        poll_interval = None if options['once'] else options[
+            'poll_interval']
+        if not options['once']:
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, lambda *_: stopping.set())
+
+        def worker():
+            try:
+                return tasks.work(poll_interval, stopping.is_set)
+            finally:
+                connections.close_all()
+
+        if options['threads'] <= 1:
+            done = tasks.work(poll_interval, stopping.is_set)
+        else:
+            with ThreadPoolExecutor(
+                    max_workers=options['threads']) as executor:
+                futures = [executor.submit(worker)
+                           for _ in range(options['threads'])]
+                done = sum(future.result() for future in futures)
+        self.stdout.write(f'Выполнено задач: {done}')
@@ -0,0 +1,35 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.slow_queries import aggregate
+
+
+def read_lines(path):
+    for log_file in sorted(path.parent.glob(f'{path.name}*')):
+        with open(log_file, encoding='utf-8') as stream:
+            yield from stream
+
+
+class Command(BaseCommand):
+    help = ('Показывает самые медленные запросы из журнала медленных '
+            'запросов, сгруппированные по отпечатку.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument('--plans', action='store_true',
+                            help='Показывать план самого медленного '
+                                 'выполнения.')
+
+    def handle(self, *args, **options):
+        groups = aggregate(read_lines(Path(settings.SLOW_QUERY_LOG_FILE)))
+        for group in groups[:options['top']]:
+            self.stdout.write(
+                f'{group["total_ms"]:.1f} мс всего, {group["count"]}×, '
+                f'макс. {group["max_ms"]:.1f} мс, '
+                f'страницы: {", ".join(sorted(group["views"])) or "—"}\n'
+                f'  {group["fingerprint"]}')
+            if options['plans']:
+                for line in group['plan']:
+                    self.stdout.write(f'    {line}')
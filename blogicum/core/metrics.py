@@ -0,0 +1,274 @@
+import atexit
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                   5.0, 10.0)
+FLUSH_INTERVAL: float = 1.0
+METRIC_TYPES = {
+    'blogicum_requests_total': 'counter',
+    'blogicum_request_duration_seconds': 'histogram',
+    'blogicum_db_queries_total': 'counter',
+    'blogicum_errors_total': 'counter',
+    'blogicum_cache_hits_total': 'counter',
+    'blogicum_cache_misses_total': 'counter',
+    'blogicum_cache_hit_ratio': 'gauge',
+}
+
+ARCHIVE_NAME = 'archived.json'
+# <pid>-<случайная часть>.json; <pid>.json — файлы прежних версий.
+PROCESS_FILE = re.compile(r'^(\d+)(-\w+)?\.json$')
+
+cache_stats_providers = {}
+
+logger = logging.getLogger('blogicum.metrics')
+
+
+def register_cache_stats(name, provider):
+    """Регистрирует источник статистики кэша.
+
+    provider возвращает словарь {'hits': ..., 'misses': ...}
+    с накопленными значениями текущего процесса.
+    """
+    cache_stats_providers[name] = provider
+
+
+def is_alive(pid):
+    if os.name != 'posix':
+        # На Windows os.kill(pid, 0) не проверяет процесс, а завершает его.
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def read_values(path):
+    values = defaultdict(float)
+    try:
+        rows = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return values
+    for name, labels, value in rows:
+        values[name, tuple(map(tuple, labels))] += value
+    return values
+
+
+def write_values(path, values):
+    temporary = path.with_suffix('.tmp')
+    temporary.write_text(json.dumps([
+        [name, labels, value] for (name, labels), value in values.items()
+    ]))
+    os.replace(temporary, path)
+
+
+class MetricsRegistry:
+    """Метрики текущего процесса.
+
+    Каждый процесс периодически сохраняет свои значения в отдельный файл
+    каталога METRICS_DIR; при выдаче метрик файлы всех процессов
+    суммируются. Значения завершившихся процессов переносятся в общий
+    архив (archived.json), поэтому счётчики не убывают и не копятся
+    в файлах бесконечно.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = defaultdict(float)
+        self.flushed_at = 0.0
+        self.token = uuid.uuid4().hex
+        self.started = False
+        atexit.register(self.close)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self.forked)
+
+    @property
+    def directory(self):
+        return Path(settings.METRICS_DIR)
+
+    @property
+    def path(self):
+        # Случайная часть имени отличает процесс от прежнего
+        # с тем же pid.
+        return self.directory / f'{os.getpid()}-{self.token}.json'
+
+    def forked(self):
+        """Дочерний процесс считает метрики заново: значения родителя
+        сохраняет сам родитель."""
+        self.lock = threading.Lock()
+        self.values = defaultdict(float)
+        self.flushed_at = 0.0
+        self.token = uuid.uuid4().hex
+        self.started = False
+
+    def inc(self, name, labels, value=1):
+        with self.lock:
+            self.values[name, labels] += value
+
+    def observe(self, name, labels, value):
+        with self.lock:
+            for bound in LATENCY_BUCKETS:
+                if value <= bound:
+                    self.values[f'{name}_bucket',
+                                labels + (('le', str(bound)),)] += 1
+            self.values[f'{name}_bucket', labels + (('le', '+Inf'),)] += 1
+            self.values[f'{name}_sum', labels] += value
+            self.values[f'{name}_count', labels] += 1
+
+    def snapshot(self):
+        with self.lock:
+            values = dict(self.values)
+        for cache, provider in cache_stats_providers.items():
+            stats = provider()
+            values['blogicum_cache_hits_total',
+                   (('cache', cache),)] = stats['hits']
+            values['blogicum_cache_misses_total',
+                   (('cache', cache),)] = stats['misses']
+        return values
+
+    def maybe_flush(self):
+        if time.monotonic() - self.flushed_at < FLUSH_INTERVAL:
+            return
+        try:
+            self.flush()
+        except OSError:
+            logger.exception('Не удалось сохранить метрики процесса.')
+
+    def flush(self):
+        self.flushed_at = time.monotonic()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if not self.started:
+            self.started = True
+            # Файлы с тем же pid оставили завершившиеся процессы.
+            self.archive(
+                path for path in self.directory.glob(f'{os.getpid()}-*.json')
+                if path != self.path)
+        write_values(self.path, self.snapshot())
+
+    def close(self):
+        """Переносит значения завершающегося процесса в архив."""
+        if not self.started:
+            return
+        try:
+            self.flush()
+            self.archive([self.path])
+            self.started = False
+        except OSError:
+            logger.exception('Не удалось перенести метрики процесса '
+                             'в архив.')
+
+    @contextmanager
+    def archive_lock(self):
+        # Без блокировки выдача метрик могла бы прочитать файл процесса
+        # и уже дополненный им архив и посчитать значения дважды.
+        if fcntl is None:
+            yield
+            return
+        with open(self.directory / 'archive.lock', 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def archive(self, paths):
+        """Добавляет значения файлов paths к архиву и удаляет файлы."""
+        paths = list(paths)
+        if not paths:
+            return
+        with self.archive_lock():
+            path = self.directory / ARCHIVE_NAME
+            totals = read_values(path)
+            for process_path in paths:
+                for key, value in read_values(process_path).items():
+                    totals[key] += value
+            write_values(path, totals)
+            for process_path in paths:
+                process_path.unlink(missing_ok=True)
+
+    def collect(self):
+        """Суммирует значения архива и всех процессов; файлы
+        завершившихся процессов переносятся в архив."""
+        self.flush()
+        finished = []
+        for path in self.directory.glob('*.json'):
+            match = PROCESS_FILE.match(path.name)
+            if match and not is_alive(int(match[1])):
+                finished.append(path)
+        self.archive(finished)
+        totals = defaultdict(float)
+        with self.archive_lock():
+            for path in self.directory.glob('*.json'):
+                for key, value in read_values(path).items():
+                    totals[key] += value
+        return totals
+
+
+registry = MetricsRegistry()
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\')
+                         .replace('"', '\\"'))
+        for key, value in sorted(labels))
+    return f'{{{pairs}}}'
+
+
+def format_value(value):
+    """Значение без потери точности: целые — без экспоненты,
+    остальные — кратчайшим точным представлением float."""
+    value = float(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def add_hit_ratios(totals):
+    hits = {labels: value for (name, labels), value in totals.items()
+            if name == 'blogicum_cache_hits_total'}
+    for labels, value in hits.items():
+        lookups = value + totals.get(
+            ('blogicum_cache_misses_total', labels), 0)
+        totals['blogicum_cache_hit_ratio', labels] = (
+            value / lookups if lookups else 0)
+
+
+def exposition(totals):
+    """Форматирует метрики в текстовом формате Prometheus."""
+    add_hit_ratios(totals)
+    families = defaultdict(list)
+    for (name, labels), value in totals.items():
+        family = next((base for base in METRIC_TYPES
+                       if name == base or name.startswith(base + '_')),
+                      name)
+        families[family].append((name, labels, value))
+    lines = []
+    for family in sorted(families):
+        lines.append(f'# TYPE {family} {METRIC_TYPES.get(family, "untyped")}')
+        for name, labels, value in sorted(families[family]):
+            lines.append(
+                f'{name}{format_labels(labels)} {format_value(value)}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,339 @@
+import cProfile
+import hmac
+import itertools
+import json
+import logging
+import random
+import threading
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+from .compression import (choose_encoding, compress, compress_cached,
+                          compress_stream, is_shared)
+from .metrics import registry
+from .profiling import save_profile
+from .queries import (QueryInspector, format_report, make_report,
+                      report_listeners)
+from .slow_queries import current_view
+from .template_timing import collect_templates
+
+timing_logger = logging.getLogger('blogicum.timing')
+query_logger = logging.getLogger('blogicum.queries')
+profiling_logger = logging.getLogger('blogicum.profiling')
+
+
+class RequestTiming:
+    """Счётчики времени одного запроса.
+
+    Экземпляр служит обёрткой выполнения SQL (execute_wrapper)
+    и накапливает число запросов и время, проведённое в БД.
+    """
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.view_started = None
+        self.render_started = None
+        self.queries = 0
+        self.db = 0.0
+        self.view = 0.0
+        self.template = 0.0
+        self.total = 0.0
+        self.templates = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db += perf_counter() - started
+
+    def start_view(self):
+        self.view_started = perf_counter()
+
+    def finish_view(self):
+        if self.view_started is not None and not self.view:
+            self.view = perf_counter() - self.view_started
+
+    def start_render(self):
+        self.render_started = perf_counter()
+
+    def finish_render(self, response=None):
+        self.template = perf_counter() - self.render_started
+
+    def finish(self):
+        self.finish_view()
+        self.total = perf_counter() - self.started
+
+    def as_dict(self):
+        return {
+            'queries': self.queries,
+            'db_ms': round(self.db * 1000, 3),
+            'view_ms': round(self.view * 1000, 3),
+            'template_ms': round(self.template * 1000, 3),
+            'total_ms': round(self.total * 1000, 3),
+            'templates': self.templates.as_dict() if self.templates else {},
+        }
+
+    def server_timing(self, templates=0):
+        metrics = [
+            f'db;dur={self.db * 1000:.2f};desc="{self.queries} queries"',
+            f'view;dur={self.view * 1000:.2f}',
+            f'tpl;dur={self.template * 1000:.2f}',
+            f'total;dur={self.total * 1000:.2f}',
+        ]
+        if self.templates and templates:
+            metrics.extend(self.templates.server_timing(templates))
+        return ', '.join(metrics)
+
+
+class ServerTimingMiddleware:
+    """Замеряет время в БД, во view и в шаблонах.
+
+    Результат отдаётся в заголовке Server-Timing и пишется строкой JSON
+    в лог blogicum.timing; для каждого шаблона и включения учитываются
+    число рендерингов и время, в заголовок попадают
+    SERVER_TIMING_TEMPLATES самых затратных. При SERVER_TIMING_ENABLED =
+    False middleware отключается при старте и не добавляет накладных
+    расходов.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVER_TIMING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'SERVER_TIMING_SAMPLE_RATE', 1)
+        self.templates = getattr(settings, 'SERVER_TIMING_TEMPLATES', 0)
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        timing = request.timing = RequestTiming()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timing))
+            timing.templates = stack.enter_context(collect_templates())
+            response = self.get_response(request)
+        timing.finish()
+        response['Server-Timing'] = timing.server_timing(self.templates)
+        resolver_match = request.resolver_match
+        timing_logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': resolver_match and resolver_match.view_name,
+            'status': response.status_code,
+            **timing.as_dict(),
+        }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing = getattr(request, 'timing', None)
+        if timing:
+            timing.start_view()
+
+    def process_template_response(self, request, response):
+        timing = getattr(request, 'timing', None)
+        if timing:
+            timing.finish_view()
+            timing.start_render()
+            response.add_post_render_callback(timing.finish_render)
+        return response
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Сжимает текстовые ответы Brotli или gzip по Accept-Encoding.
+
+    Потоковые ответы сжимаются по частям без буферизации всего тела;
+    обычные — целиком; результат для ответов, общих для всех
+    посетителей, кэшируется по дайджесту содержимого
+    (COMPRESSION_CACHE_ENABLED). Ответы, у которых уже
+    есть Content-Encoding (кэш страниц, сжатая статика), не трогаются.
+    """
+
+    min_length = 200
+    compressible_types = ('text/', 'application/json',
+                          'application/javascript', 'application/xml',
+                          'image/svg+xml')
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'COMPRESSION_ENABLED', False):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_response(self, request, response):
+        if (response.has_header('Content-Encoding')
+                or not response.get('Content-Type', '').startswith(
+                    self.compressible_types)
+                or not response.streaming
+                and len(response.content) < self.min_length):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request)
+        if encoding is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                encoding, response.streaming_content)
+            del response['Content-Length']
+        else:
+            compressed = (compress_cached if is_shared(request, response)
+                          else compress)(encoding, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+
+class QueryCounter:
+    def __init__(self):
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """Собирает число запросов, гистограммы задержки и ошибки
+    по имени маршрута (например, blog:index) для эндпоинта метрик."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        started = perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        duration = perf_counter() - started
+        resolver_match = request.resolver_match
+        view = (('view', resolver_match.view_name if resolver_match
+                 else '<unresolved>'),)
+        registry.inc('blogicum_requests_total', view + (
+            ('method', request.method),
+            ('status', str(response.status_code))))
+        registry.observe('blogicum_request_duration_seconds', view,
+                         duration)
+        registry.inc('blogicum_db_queries_total', view, counter.queries)
+        if response.status_code >= 500:
+            registry.inc('blogicum_errors_total', view + (
+                ('exception', getattr(request, 'exception_name', '')),))
+        registry.maybe_flush()
+        return response
+
+    def process_exception(self, request, exception):
+        request.exception_name = type(exception).__name__
+
+
+class QueryInspectorMiddleware:
+    """Ищет N+1 и превышение бюджета запросов к БД (QUERY_BUDGETS).
+
+    Предназначен для разработки и тестов: находки пишутся в лог
+    blogicum.queries и передаются подписчикам report_listeners
+    (через них работает pytest-плагин core.pytest_plugin).
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_INSPECTOR_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        inspector = QueryInspector()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(inspector))
+            response = self.get_response(request)
+        resolver_match = request.resolver_match
+        report = make_report(
+            resolver_match.view_name if resolver_match else '<unresolved>',
+            inspector)
+        if report['repeated'] or report['over_budget']:
+            query_logger.warning(format_report(report))
+        for listener in report_listeners:
+            listener(report)
+        return response
+
+
+class SlowQueryLogMiddleware:
+    """Сообщает журналу медленных запросов имя текущего маршрута."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SLOW_QUERY_LOG_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = current_view.set(None)
+        try:
+            return self.get_response(request)
+        finally:
+            current_view.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_view.set(request.resolver_match.view_name)
+
+
+class ProfilingMiddleware:
+    """Профилирует каждый PROFILING_EVERY_N-й запрос или запрос
+    с заголовком X-Profile-Token, равным PROFILING_TOKEN.
+
+    Для каждого такого запроса в PROFILING_DIR/<имя маршрута>/ пишутся
+    .prof и свёрнутые стеки для flamegraph; общий объём каталога
+    ограничен PROFILING_MAX_BYTES.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.every_n = getattr(settings, 'PROFILING_EVERY_N', 0)
+        self.token = getattr(settings, 'PROFILING_TOKEN', '')
+        self.counter = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def should_profile(self, request):
+        token = request.headers.get('X-Profile-Token')
+        if token and self.token and hmac.compare_digest(token, self.token):
+            return True
+        return bool(self.every_n) and next(self.counter) % self.every_n == 0
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+        # cProfile не допускает одновременной работы двух профилировщиков.
+        if not self.lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                response = self.get_response(request)
+                if hasattr(response, 'render') and not response.is_rendered:
+                    response.render()
+            finally:
+                profile.disable()
+        finally:
+            self.lock.release()
+        resolver_match = request.resolver_match
+        try:
+            save_profile(profile, resolver_match.view_name if resolver_match
+                         else 'unresolved')
+        except OSError:
+            profiling_logger.exception('Не удалось сохранить профиль.')
+        return response
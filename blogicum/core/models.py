@@ -0,0 +1,76 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Отложенная задача очереди core.tasks.
+
+    Выполненные задачи удаляются; в таблице остаются ожидающие,
+    выполняющиеся и исчерпавшие попытки.
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    task = models.CharField(
+        max_length=200,
+        verbose_name='Задача'
+    )
+    args = models.JSONField(
+        default=list,
+        verbose_name='Аргументы'
+    )
+    kwargs = models.JSONField(
+        default=dict,
+        verbose_name='Именованные аргументы'
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=STATUSES,
+        default=QUEUED,
+        verbose_name='Состояние'
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    max_attempts = models.PositiveIntegerField(
+        verbose_name='Наибольшее число попыток'
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Выполнить не раньше'
+    )
+    locked_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Занята исполнителем до',
+        help_text='Если исполнитель не завершил задачу к этому времени, '
+                  'её возьмёт другой.'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Добавлено'
+    )
+
+    class Meta:
+        verbose_name = 'задача'
+        verbose_name_plural = 'Задачи'
+        ordering = ('run_at', 'pk')
+        indexes = (
+            models.Index(fields=('status', 'run_at'),
+                         name='core_job_status_run_at_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.task} #{self.pk}'
@@ -0,0 +1,136 @@
+import hashlib
+from functools import lru_cache, wraps
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.template import engines
+from django.utils.cache import patch_vary_headers
+
+from .metrics import register_cache_stats
+from .compression import accepted_encodings, brotli, compress
+
+PAGE_CACHE_PREFIX = 'page'
+PAGE_CACHE_TIMEOUT = None
+# Варианты авторизованных пользователей не живут до развёртывания:
+# их число растёт с числом пользователей.
+PAGE_CACHE_USER_TIMEOUT = 600
+CACHEABLE_STATUSES = (200, 403, 404, 500)
+
+stats = {'hits': 0, 'misses': 0}
+register_cache_stats('pages', lambda: dict(stats))
+
+
+@lru_cache(maxsize=1)
+def _fingerprint():
+    files = [Path(settings.STATIC_ROOT) / 'staticfiles.json']
+    for engine in engines.all():
+        for directory in map(Path, engine.template_dirs):
+            files.extend(directory.rglob('*'))
+    digest = hashlib.sha1()
+    for path in sorted(files):
+        if path.is_file():
+            stat = path.stat()
+            digest.update(f'{path}:{stat.st_mtime_ns}:{stat.st_size}'
+                          .encode())
+    return digest.hexdigest()[:12]
+
+
+def template_fingerprint():
+    """Отпечаток шаблонов и манифеста статики.
+
+    Меняется при развёртывании и при правке шаблонов, поэтому
+    ключи кэша старой версии страниц перестают использоваться.
+    В режиме отладки пересчитывается при каждом обращении.
+    """
+    if settings.DEBUG:
+        _fingerprint.cache_clear()
+    return _fingerprint()
+
+
+def get_variant(request):
+    # Шапка страницы содержит имя пользователя, поэтому у каждого
+    # авторизованного пользователя свой вариант страницы; имя входит
+    # в ключ, и после переименования вариант строится заново.
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return 'anonymous'
+    username = hashlib.sha1(user.get_username().encode()).hexdigest()[:12]
+    return f'user-{user.pk}-{username}'
+
+
+def get_timeout(variant):
+    if variant == 'anonymous':
+        return getattr(settings, 'PAGE_CACHE_TIMEOUT', PAGE_CACHE_TIMEOUT)
+    return getattr(settings, 'PAGE_CACHE_USER_TIMEOUT',
+                   PAGE_CACHE_USER_TIMEOUT)
+
+
+def make_entry(response):
+    content = response.content
+    entry = {
+        'status': response.status_code,
+        'content_type': response['Content-Type'],
+        'digest': hashlib.sha1(content).hexdigest(),
+        'identity': content,
+        'gzip': compress('gzip', content, 9),
+    }
+    if brotli is not None:
+        entry['br'] = compress('br', content, 11)
+    return entry
+
+
+def serve_entry(request, entry):
+    encodings = accepted_encodings(request)
+    encoding = next((name for name in ('br', 'gzip')
+                     if name in entry and name in encodings), None)
+    etag = (f'"{entry["digest"]}-{encoding}"' if encoding
+            else f'"{entry["digest"]}"')
+    if entry['status'] == 200 and etag in [
+            tag.strip().removeprefix('W/') for tag in
+            request.headers.get('If-None-Match', '').split(',')]:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(entry[encoding or 'identity'],
+                                status=entry['status'],
+                                content_type=entry['content_type'])
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Accept-Encoding', 'Cookie'))
+    return response
+
+
+def cached_page(name):
+    """Кэширует готовые байты страницы вместе со сжатыми вариантами.
+
+    Ключ включает имя страницы, вариант по авторизации
+    и отпечаток шаблонов. Варианты авторизованных пользователей
+    хранятся PAGE_CACHE_USER_TIMEOUT секунд. Включается настройкой
+    PAGE_CACHE_ENABLED.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not getattr(settings, 'PAGE_CACHE_ENABLED', False):
+                return view(request, *args, **kwargs)
+            variant = get_variant(request)
+            key = ':'.join((PAGE_CACHE_PREFIX, name, variant,
+                            template_fingerprint()))
+            entry = cache.get(key)
+            if entry is None:
+                stats['misses'] += 1
+                response = view(request, *args, **kwargs)
+                if hasattr(response, 'render'):
+                    response.render()
+                if (response.streaming or response.cookies
+                        or response.status_code not in CACHEABLE_STATUSES):
+                    return response
+                entry = make_entry(response)
+                cache.set(key, entry, get_timeout(variant))
+            else:
+                stats['hits'] += 1
+            return serve_entry(request, entry)
+        return wrapper
+    return decorator
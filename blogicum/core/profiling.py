@@ -0,0 +1,96 @@
+import os
+import pstats
+import re
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+
+PROFILING_MAX_BYTES: int = 100 * 1024 * 1024
+COLLAPSE_MAX_DEPTH: int = 64
+# Ветви дешевле этой доли общего времени отбрасываются: иначе число
+# путей в графе вызовов растёт экспоненциально.
+COLLAPSE_MIN_SHARE: float = 0.001
+
+
+def function_label(func):
+    filename, line, name = func
+    if filename == '~':
+        return name
+    return f'{Path(filename).stem}:{name}:{line}'
+
+
+def find_roots(stats):
+    """Функции, часть вызовов которых пришла из кадров вне профилирования
+    (например, из самого middleware), с долей таких вызовов."""
+    roots = {}
+    for func, (_, calls, _, _, callers) in stats.stats.items():
+        known = sum(via[1] for caller, via in callers.items()
+                    if caller in stats.stats)
+        if calls > known:
+            roots[func] = (calls - known) / calls
+    return roots
+
+
+def collapse(stats):
+    """Строит свёрнутые стеки (формат flamegraph.pl) из статистики cProfile.
+
+    cProfile хранит только пары «вызывающий — вызываемый», поэтому
+    собственное время функции распределяется по путям вызова
+    пропорционально накопленному времени каждого вызывающего.
+    """
+    callees = defaultdict(dict)
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, (_, _, _, via_caller) in callers.items():
+            callees[caller][func] = via_caller
+    lines = defaultdict(float)
+    roots = find_roots(stats)
+    cutoff = COLLAPSE_MIN_SHARE * sum(
+        stats.stats[func][3] * share for func, share in roots.items())
+
+    def walk(func, path, share):
+        own, total = stats.stats[func][2], stats.stats[func][3]
+        if total * share < cutoff:
+            return
+        path = path + (function_label(func),)
+        lines[';'.join(path)] += own * share
+        if len(path) >= COLLAPSE_MAX_DEPTH:
+            return
+        for callee, via_func in callees[func].items():
+            callee_total = stats.stats[callee][3]
+            if callee_total and function_label(callee) not in path:
+                walk(callee, path, share * via_func / callee_total)
+
+    for func, share in roots.items():
+        walk(func, (), share)
+    return '\n'.join(
+        f'{stack} {round(seconds * 1_000_000)}'
+        for stack, seconds in sorted(lines.items())
+        if seconds * 1_000_000 >= 1
+    ) + '\n'
+
+
+def enforce_disk_cap(directory, max_bytes):
+    """Удаляет самые старые профили, пока каталог не уложится в лимит."""
+    files = sorted((path for path in Path(directory).rglob('*')
+                    if path.is_file()),
+                   key=lambda path: path.stat().st_mtime)
+    used = sum(path.stat().st_size for path in files)
+    for path in files:
+        if used <= max_bytes:
+            break
+        used -= path.stat().st_size
+        path.unlink()
+
+
+def save_profile(profile, view_name):
+    directory = Path(settings.PROFILING_DIR)
+    view_directory = directory / re.sub(r'[^\w.-]', '_', view_name)
+    view_directory.mkdir(parents=True, exist_ok=True)
+    stem = view_directory / f'{time.time_ns()}-{os.getpid()}'
+    profile.dump_stats(f'{stem}.prof')
+    Path(f'{stem}.collapsed').write_text(collapse(pstats.Stats(profile)))
+    enforce_disk_cap(directory, getattr(settings, 'PROFILING_MAX_BYTES',
+                                        PROFILING_MAX_BYTES))
+    return stem
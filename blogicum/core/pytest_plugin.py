@@ -0,0 +1,49 @@
+"""pytest-плагин: проваливает тест, если страница превысила
+бюджет запросов к БД или (с флагом --fail-on-n-plus-one) выполнила N+1.
+
+Бюджеты берутся из settings.QUERY_BUDGETS и могут быть уточнены
+маркером @pytest.mark.query_budget('blog:index', 5).
+"""
+import pytest
+from django.conf import settings
+from django.test import override_settings
+
+from core.queries import format_report, report_listeners
+
+
+def pytest_addoption(parser):
+    parser.getgroup('blogicum').addoption(
+        '--fail-on-n-plus-one', action='store_true',
+        help='Проваливать тесты, в которых страница выполняет N+1 запросов.')
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'query_budget(view_name, limit): максимальное число запросов к БД '
+        'для страницы в этом тесте.')
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    reports = []
+    budgets = dict(getattr(settings, 'QUERY_BUDGETS', {}))
+    for marker in reversed(list(item.iter_markers('query_budget'))):
+        view_name, limit = marker.args
+        budgets[view_name] = limit
+    report_listeners.append(reports.append)
+    try:
+        with override_settings(QUERY_BUDGETS=budgets):
+            outcome = yield
+    finally:
+        report_listeners.remove(reports.append)
+    if outcome.excinfo is not None:
+        return
+    fail_on_repeats = item.config.getoption('fail_on_n_plus_one')
+    failures = [
+        report for report in reports
+        if report['over_budget'] or (fail_on_repeats and report['repeated'])
+    ]
+    if failures:
+        pytest.fail('\n'.join(map(format_report, failures)),
+                    pytrace=False)
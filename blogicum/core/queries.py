@@ -0,0 +1,102 @@
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+
+FINGERPRINT_RULES = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(?+)'),
+    (re.compile(r'\s+'), ' '),
+)
+N_PLUS_ONE_THRESHOLD: int = 3
+
+report_listeners = []
+
+
+def fingerprint(sql):
+    """Приводит SQL к форме, не зависящей от значений параметров."""
+    for pattern, replacement in FINGERPRINT_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def find_location():
+    """Возвращает строку шаблона и строку кода проекта,
+    откуда выполняется текущий запрос к БД."""
+    template = code = None
+    project_dir = str(Path(settings.BASE_DIR).resolve())
+    frame = sys._getframe(1)
+    while frame and not (template and code):
+        node = frame.f_locals.get('self')
+        if (template is None and frame.f_code.co_name == 'render_annotated'
+                and getattr(node, 'origin', None) is not None):
+            template = f'{node.origin.template_name}:{node.token.lineno}'
+        filename = frame.f_code.co_filename
+        if (code is None and filename.startswith(project_dir)
+                and not filename.startswith(str(Path(__file__).parent))):
+            code = f'{filename[len(project_dir) + 1:]}:{frame.f_lineno}'
+        frame = frame.f_back
+    return {'template': template, 'code': code}
+
+
+class QueryInspector:
+    """Обёртка выполнения SQL, группирующая запросы по отпечатку.
+
+    Повтор запроса одной формы N_PLUS_ONE_THRESHOLD и более раз
+    за запрос к сайту считается признаком N+1; для таких запросов
+    запоминается место в шаблоне и в коде, где случился первый повтор.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.locations = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        shape = fingerprint(sql)
+        self.counts[shape] += 1
+        if self.counts[shape] == 2:
+            self.locations[shape] = find_location()
+        return execute(sql, params, many, context)
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def repeated(self, threshold=N_PLUS_ONE_THRESHOLD):
+        return [
+            {'sql': shape, 'count': count, **self.locations[shape]}
+            for shape, count in self.counts.most_common()
+            if count >= threshold
+        ]
+
+
+def get_query_budget(view_name):
+    return getattr(settings, 'QUERY_BUDGETS', {}).get(view_name)
+
+
+def make_report(view_name, inspector):
+    budget = get_query_budget(view_name)
+    return {
+        'view': view_name,
+        'queries': inspector.total,
+        'budget': budget,
+        'over_budget': budget is not None and inspector.total > budget,
+        'repeated': inspector.repeated(
+            getattr(settings, 'N_PLUS_ONE_THRESHOLD', N_PLUS_ONE_THRESHOLD)),
+    }
+
+
+def format_report(report):
+    lines = [f'{report["view"]}: {report["queries"]} запросов к БД'
+             + (f' (бюджет {report["budget"]})'
+                if report['budget'] is not None else '')]
+    for query in report['repeated']:
+        lines.append(
+            f'  N+1: {query["count"]}× {query["sql"][:120]}\n'
+            f'    шаблон: {query["template"] or "—"}, '
+            f'код: {query["code"] or "—"}')
+    return '\n'.join(lines)
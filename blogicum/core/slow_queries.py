@@ -0,0 +1,86 @@
+import json
+import logging
+from collections import defaultdict
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+
+from .queries import fingerprint
+
+SLOW_QUERY_THRESHOLD_MS: int = 100
+
+logger = logging.getLogger('blogicum.slow_queries')
+current_view = ContextVar('current_view', default=None)
+
+
+def explain(connection, sql, params):
+    """План запроса SQLite (EXPLAIN QUERY PLAN) в виде дерева строк."""
+    if (connection.vendor != 'sqlite'
+            or not sql.lstrip().upper().startswith('SELECT')):
+        return []
+    # Курсор драйвера без обёрток Django: план не должен попадать в лог.
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        raw.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        rows = raw.fetchall()
+    depth = {0: -1}
+    plan = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        plan.append('  ' * depth[node_id] + detail)
+    return plan
+
+
+def log_slow_query(execute, sql, params, many, context):
+    started = perf_counter()
+    result = execute(sql, params, many, context)
+    duration = (perf_counter() - started) * 1000
+    threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS',
+                        SLOW_QUERY_THRESHOLD_MS)
+    if duration >= threshold:
+        try:
+            plan = [] if many else explain(context['connection'], sql,
+                                           params)
+        except Exception:
+            plan = ['план недоступен']
+        logger.warning(json.dumps({
+            'fingerprint': fingerprint(sql),
+            'sql': sql,
+            'params': [str(param) for param in params or ()]
+            if not many else [],
+            'duration_ms': round(duration, 3),
+            'view': current_view.get(),
+            'plan': plan,
+        }, ensure_ascii=False))
+    return result
+
+
+def install(sender, connection, **kwargs):
+    if getattr(settings, 'SLOW_QUERY_LOG_ENABLED', False):
+        connection.execute_wrappers.append(log_slow_query)
+
+
+def aggregate(lines):
+    """Группирует записи лога по отпечатку запроса.
+
+    Возвращает список, отсортированный по суммарному времени.
+    """
+    groups = defaultdict(lambda: {'count': 0, 'total_ms': 0.0,
+                                  'max_ms': 0.0, 'views': set()})
+    for line in lines:
+        try:
+            entry = json.loads(line[line.index('{'):])
+        except ValueError:
+            continue
+        group = groups[entry['fingerprint']]
+        group['count'] += 1
+        group['total_ms'] += entry['duration_ms']
+        if entry['duration_ms'] >= group['max_ms']:
+            group['max_ms'] = entry['duration_ms']
+            group['plan'] = entry['plan']
+        if entry['view']:
+            group['views'].add(entry['view'])
+    return sorted(
+        ({'fingerprint': key, **group} for key, group in groups.items()),
+        key=lambda group: group['total_ms'], reverse=True)
@@ -0,0 +1,162 @@
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.template import engines
+
+from .compression import brotli, compress
+
+COMPRESSIBLE_SUFFIXES = ('.css', '.js', '.svg', '.json', '.txt', '.ico')
+SOURCE_SUFFIXES = ('.html', '.txt', '.py', '.js')
+COMMENT = re.compile(r'/\*(?!!).*?\*/', re.S)
+CSS_CLASS = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+# Классы внутри :not() не обязаны встречаться в разметке.
+NEGATION = re.compile(r':not\([^)]*\)')
+TOKEN = re.compile(r'[\w-]+')
+NESTED_AT_RULES = ('@media', '@supports', '@layer', '@container')
+
+
+def iter_purge_sources():
+    """Шаблоны всех движков и дополнительные каталоги
+    из STATIC_PURGE_SOURCES: в них ищутся используемые классы CSS."""
+    for engine in engines.all():
+        yield from map(Path, engine.template_dirs)
+    yield from map(Path, getattr(settings, 'STATIC_PURGE_SOURCES', ()))
+
+
+def collect_used_tokens(sources):
+    tokens = set(getattr(settings, 'STATIC_PURGE_SAFELIST', ()))
+    for directory in sources:
+        for path in directory.rglob('*'):
+            if path.suffix in SOURCE_SUFFIXES and path.is_file():
+                tokens.update(TOKEN.findall(
+                    path.read_text(errors='ignore')))
+    return tokens
+
+
+def skip_string(css, start):
+    quote = css[start]
+    position = start + 1
+    while position < len(css) and css[position] != quote:
+        position += 2 if css[position] == '\\' else 1
+    return position + 1
+
+
+def find_block_end(css, start):
+    """Позиция после фигурной скобки, закрывающей блок из start."""
+    depth = 0
+    position = start
+    while position < len(css):
+        char = css[position]
+        if char in '"\'':
+            position = skip_string(css, position)
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return position + 1
+        position += 1
+    return position
+
+
+def split_selectors(prelude):
+    selectors = []
+    depth = start = 0
+    for position, char in enumerate(prelude):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            selectors.append(prelude[start:position])
+            start = position + 1
+    selectors.append(prelude[start:])
+    return selectors
+
+
+def purge_css(css, used):
+    """Удаляет правила, селекторы которых ссылаются на неиспользуемые
+    классы; вложенные @media и @supports очищаются рекурсивно."""
+    css = COMMENT.sub('', css)
+    rules = []
+    position = 0
+    while position < len(css):
+        brace = css.find('{', position)
+        semicolon = css.find(';', position)
+        if brace == -1:
+            rules.append(css[position:].strip())
+            break
+        if semicolon != -1 and semicolon < brace:
+            rules.append(css[position:semicolon + 1].strip())
+            position = semicolon + 1
+            continue
+        end = find_block_end(css, brace)
+        prelude = css[position:brace].strip()
+        body = css[brace + 1:end - 1]
+        position = end
+        if prelude.startswith(NESTED_AT_RULES):
+            body = purge_css(body, used)
+            if body:
+                rules.append(f'{prelude}{{{body}}}')
+        elif prelude.startswith('@'):
+            rules.append(f'{prelude}{{{body}}}')
+        else:
+            selectors = [
+                selector for selector in split_selectors(prelude)
+                if used.issuperset(
+                    CSS_CLASS.findall(NEGATION.sub('', selector)))
+            ]
+            if selectors:
+                rules.append(f'{",".join(selectors)}{{{body}}}')
+    return ''.join(rules)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хранилище статики для production.
+
+    Перед добавлением хэша в имена файлов удаляет из CSS, перечисленных
+    в STATIC_PURGE_CSS, правила для классов, которых нет в шаблонах;
+    после — сохраняет рядом сжатые варианты .gz и (если установлен
+    пакет brotli) .br.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = self.purge(paths)
+        yield from super().post_process(paths, dry_run, **options)
+        if not dry_run:
+            for name in set(self.hashed_files.values()):
+                self.compress(name)
+
+    def purge(self, paths):
+        targets = [name for name in getattr(settings, 'STATIC_PURGE_CSS', ())
+                   if name in paths]
+        if not targets:
+            return paths
+        used = collect_used_tokens(iter_purge_sources())
+        paths = dict(paths)
+        for name in targets:
+            storage, path = paths[name]
+            with storage.open(path) as source:
+                css = source.read().decode()
+            if self.exists(name):
+                self.delete(name)
+            self._save(name, ContentFile(purge_css(css, used).encode()))
+            paths[name] = (self, name)
+        return paths
+
+    def compress(self, name):
+        if not name.endswith(COMPRESSIBLE_SUFFIXES):
+            return
+        path = Path(self.path(name))
+        content = path.read_bytes()
+        variants = [('.gz', compress('gzip', content, 9))]
+        if brotli is not None:
+            variants.append(('.br', compress('br', content, 11)))
+        for suffix, compressed in variants:
+            if len(compressed) < len(content):
+                path.with_name(path.name + suffix).write_bytes(compressed)
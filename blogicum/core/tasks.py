@@ -0,0 +1,150 @@
+import logging
+import time
+import traceback
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .locks import cache_lock
+from .models import Job
+
+TASK_MAX_ATTEMPTS: int = 5
+TASK_RETRY_DELAY: int = 10
+TASK_MAX_RETRY_DELAY: int = 3600
+TASK_VISIBILITY_TIMEOUT: int = 300
+# Через сколько секунд повторить последовательную задачу, если такую же
+# сейчас выполняет другой исполнитель.
+TASK_SERIAL_DELAY: float = 1.0
+
+logger = logging.getLogger('blogicum.tasks')
+
+registry = {}
+
+
+def task(func=None, *, serial=False):
+    """Регистрирует функцию как задачу очереди под именем
+    «модуль.функция»; аргументы задачи должны сериализоваться в JSON.
+
+    Задачи с serial=True не выполняются одновременно ни в потоках
+    одного исполнителя, ни в разных процессах.
+    """
+    if func is None:
+        return partial(task, serial=serial)
+    func.task_name = f'{func.__module__}.{func.__qualname__}'
+    func.serial = serial
+    registry[func.task_name] = func
+    return func
+
+
+def enqueue(func, *args, **kwargs):
+    """Ставит задачу func в очередь после фиксации текущей транзакции.
+
+    С TASKS_EAGER задача выполняется сразу в этом же процессе.
+    """
+    if getattr(settings, 'TASKS_EAGER', False):
+        func(*args, **kwargs)
+        return
+    transaction.on_commit(lambda: Job.objects.create(
+        task=func.task_name, args=list(args), kwargs=kwargs,
+        max_attempts=getattr(settings, 'TASK_MAX_ATTEMPTS',
+                             TASK_MAX_ATTEMPTS)))
+
+
+def get_visibility_timeout():
+    return timedelta(seconds=getattr(settings, 'TASK_VISIBILITY_TIMEOUT',
+                                     TASK_VISIBILITY_TIMEOUT))
+
+
+def retry_delay(attempts):
+    delay = getattr(settings, 'TASK_RETRY_DELAY', TASK_RETRY_DELAY)
+    return timedelta(seconds=min(delay * 2 ** (attempts - 1),
+                                 TASK_MAX_RETRY_DELAY))
+
+
+def claim(now=None):
+    """Забирает одну готовую задачу; None, если таких нет.
+
+    Задача, исполнитель которой не уложился в TASK_VISIBILITY_TIMEOUT
+    (например, завершился аварийно), снова считается готовой.
+    Захват — условный UPDATE, поэтому одну задачу не возьмут два
+    исполнителя и без блокировок строк.
+    """
+    now = now or timezone.now()
+    expired = Q(status=Job.RUNNING, locked_until__lt=now)
+    Job.objects.filter(expired, attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, locked_until=None,
+        last_error='Исполнитель не завершил задачу вовремя.')
+    ready = Q(status=Job.QUEUED, run_at__lte=now) | expired
+    for pk in Job.objects.filter(ready).values_list('pk', flat=True)[:10]:
+        claimed = Job.objects.filter(ready, pk=pk).update(
+            status=Job.RUNNING, attempts=F('attempts') + 1,
+            locked_until=now + get_visibility_timeout())
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def postpone(job):
+    """Возвращает задачу в очередь, не считая попытку."""
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.QUEUED, attempts=F('attempts') - 1, locked_until=None,
+        run_at=timezone.now() + timedelta(seconds=TASK_SERIAL_DELAY))
+
+
+def run(job):
+    """Выполняет задачу; при ошибке откладывает повтор
+    с экспоненциально растущей паузой."""
+    func = registry.get(job.task)
+    if not getattr(func, 'serial', False):
+        return execute(job, func)
+    # Блокировка истекает вместе со сроком, после которого задачу
+    # упавшего исполнителя забирает другой.
+    timeout = int(get_visibility_timeout().total_seconds())
+    with cache_lock(f'tasks:serial:{job.task}',
+                    timeout=timeout) as acquired:
+        if not acquired:
+            postpone(job)
+            return False
+        return execute(job, func)
+
+
+def execute(job, func):
+    try:
+        if func is None:
+            raise LookupError(f'Неизвестная задача {job.task}.')
+        func(*job.args, **job.kwargs)
+    except Exception:
+        logger.exception('Задача %s не выполнена (попытка %s из %s)',
+                         job, job.attempts, job.max_attempts)
+        failed = job.attempts >= job.max_attempts
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.FAILED if failed else Job.QUEUED,
+            run_at=timezone.now() + retry_delay(job.attempts),
+            locked_until=None, last_error=traceback.format_exc())
+        return False
+    Job.objects.filter(pk=job.pk).delete()
+    return True
+
+
+def work(poll_interval, stop):
+    """Цикл исполнителя: выполняет готовые задачи, пока stop()
+    не вернёт True; без задач ждёт poll_interval секунд или, если
+    poll_interval равен None, завершается. Возвращает число
+    выполненных задач."""
+    done = 0
+    while not stop():
+        job = claim()
+        if job is None:
+            if poll_interval is None:
+                break
+            # Между опросами соединение с БД не держится открытым
+            # дольше CONN_MAX_AGE.
+            close_old_connections()
+            time.sleep(poll_interval)
+            continue
+        done += run(job)
+    return done
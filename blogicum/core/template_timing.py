@@ -0,0 +1,91 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.template.base import Template
+
+# Активные сборщики: замеры бенчмарка и middleware могут быть вложены.
+current_templates = ContextVar('current_templates', default=())
+
+
+class TemplateTimings:
+    """Время рендеринга каждого шаблона и включения за один запрос.
+
+    total — полное время рендеринга шаблона, own — за вычетом
+    вложенных шаблонов (включений и родителя через extends).
+    """
+
+    def __init__(self):
+        self.stats = defaultdict(lambda: {'count': 0, 'total': 0.0,
+                                          'own': 0.0})
+        self.stack = []
+
+    def enter(self):
+        self.stack.append(0.0)
+
+    def leave(self, name, elapsed):
+        nested = self.stack.pop()
+        if self.stack:
+            self.stack[-1] += elapsed
+        row = self.stats[name]
+        row['count'] += 1
+        row['total'] += elapsed
+        row['own'] += elapsed - nested
+
+    def as_dict(self):
+        return {
+            name: {'count': row['count'],
+                   'total_ms': round(row['total'] * 1000, 3),
+                   'own_ms': round(row['own'] * 1000, 3)}
+            for name, row in sorted(self.stats.items(),
+                                    key=lambda item: -item[1]['own'])
+        }
+
+    def server_timing(self, limit):
+        return [
+            f'tpl{number};dur={row["own_ms"]:.2f};'
+            f'desc="{name} x{row["count"]}"'
+            for number, (name, row) in enumerate(
+                list(self.as_dict().items())[:limit], 1)
+        ]
+
+
+def install():
+    """Оборачивает Template._render.
+
+    Вызывается при каждом включении замеров: тестовое окружение Django
+    подменяет Template._render своей обёрткой, и замер должен
+    оборачивать уже её.
+    """
+    if getattr(Template._render, 'timed', False):
+        return
+    original = Template._render
+
+    def _render(self, context):
+        collectors = current_templates.get()
+        if not collectors:
+            return original(self, context)
+        for timings in collectors:
+            timings.enter()
+        started = perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            elapsed = perf_counter() - started
+            for timings in collectors:
+                timings.leave(self.name or '<string>', elapsed)
+
+    _render.timed = True
+    Template._render = _render
+
+
+@contextmanager
+def collect_templates():
+    install()
+    timings = TemplateTimings()
+    token = current_templates.set(current_templates.get() + (timings,))
+    try:
+        yield timings
+    finally:
+        current_templates.reset(token)
@@ -0,0 +1,43 @@
+import logging
+from pathlib import Path
+
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+
+TEMPLATE_SUFFIXES = ('.html', '.txt')
+
+logger = logging.getLogger('blogicum.templates')
+
+
+def iter_templates():
+    """Пары (движок, имя шаблона) для всех шаблонов из каталогов DIRS."""
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for directory in map(Path, engine.engine.dirs):
+            for path in sorted(directory.rglob('*')):
+                if path.suffix in TEMPLATE_SUFFIXES:
+                    yield engine, path.relative_to(directory).as_posix()
+
+
+def compile_templates():
+    """Компилирует все шаблоны проекта.
+
+    С кэширующим загрузчиком скомпилированные шаблоны остаются
+    в памяти процесса. Возвращает список пар (имя, ошибка).
+    """
+    errors = []
+    for engine, name in iter_templates():
+        try:
+            engine.get_template(name)
+        except TemplateSyntaxError as error:
+            errors.append((name, error))
+    return errors
+
+
+def warm_up_templates():
+    if not getattr(settings, 'TEMPLATE_WARMUP', False):
+        return
+    for name, error in compile_templates():
+        logger.error('Шаблон %s не компилируется: %s', name, error)
@@ -0,0 +1,218 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+
+from .metrics import register_cache_stats
+
+LOCAL_CACHE_SIZE: int = 10000
+LOCAL_CACHE_TIMEOUT: int = 60
+LOCAL_CACHE_CHECK_INTERVAL: float = 1.0
+
+_missing = object()
+
+
+def is_local_enabled():
+    return getattr(settings, 'LOCAL_CACHE_ENABLED', False)
+
+
+def is_shared(alias=DEFAULT_CACHE_ALIAS):
+    """Кэш общий для процессов: LocMemCache у каждого процесса свой."""
+    return not isinstance(caches[alias], LocMemCache)
+
+
+class LocalCache:
+    """Ограниченный LRU-кэш процесса со сроком жизни записей.
+
+    Значения хранятся сериализованными, и каждое чтение возвращает
+    новую копию: изменения объекта в одном запросе (например,
+    добавленный comment_count) не видны другим запросам и потокам.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return default
+            self.entries.move_to_end(key)
+        return pickle.loads(value)
+
+    def set(self, key, value, timeout):
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + timeout)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class TwoTierCache:
+    """Кэш процесса перед общим кэшем Django.
+
+    Чтение сначала обращается к LRU-кэшу процесса, промахи — к общему
+    кэшу. Изменения (set, delete, incr) увеличивают счётчик поколения
+    пространства имён в общем кэше; остальные процессы сверяют его
+    не чаще раза в LOCAL_CACHE_CHECK_INTERVAL секунд и при расхождении
+    очищают свой кэш целиком. Значения, прочитанные из БД при промахе,
+    ничего не меняют и записываются с broadcast=False.
+
+    Без LOCAL_CACHE_ENABLED все операции идут напрямую в общий кэш.
+    """
+
+    def __init__(self, name, shared=cache, max_entries=None):
+        self.name = name
+        self.shared = shared
+        self.local = LocalCache(max_entries or getattr(
+            settings, 'LOCAL_CACHE_SIZE', LOCAL_CACHE_SIZE))
+        self.generation = None
+        self.checked_at = 0.0
+        self.stats = {'local': {'hits': 0, 'misses': 0},
+                      'shared': {'hits': 0, 'misses': 0}}
+        for tier, stats in self.stats.items():
+            register_cache_stats(f'{name}:{tier}',
+                                 lambda stats=stats: dict(stats))
+
+    @property
+    def generation_key(self):
+        return f'two_tier:{self.name}:generation'
+
+    def local_timeout(self, timeout):
+        local_timeout = getattr(settings, 'LOCAL_CACHE_TIMEOUT',
+                                LOCAL_CACHE_TIMEOUT)
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return local_timeout
+        return min(timeout, local_timeout)
+
+    def new_generation(self):
+        # Счётчик начинается со времени создания, а не с нуля:
+        # после вытеснения ключа из общего кэша значение не повторит
+        # уже виденное другими процессами.
+        generation = time.time_ns()
+        if not self.shared.add(self.generation_key, generation, None):
+            generation = self.shared.get(self.generation_key, generation)
+        return generation
+
+    def check_generation(self):
+        """Очищает кэш процесса, если другой процесс изменил данные."""
+        now = time.monotonic()
+        interval = getattr(settings, 'LOCAL_CACHE_CHECK_INTERVAL',
+                           LOCAL_CACHE_CHECK_INTERVAL)
+        if self.generation is not None and now - self.checked_at < interval:
+            return
+        generation = self.shared.get(self.generation_key)
+        if generation is None:
+            generation = self.new_generation()
+        if generation != self.generation:
+            self.local.clear()
+            self.generation = generation
+        self.checked_at = now
+
+    def broadcast(self):
+        try:
+            generation = self.shared.incr(self.generation_key)
+        except ValueError:
+            generation = self.new_generation()
+            self.local.clear()
+        else:
+            # Пропущенное изменение другого процесса.
+            if self.generation is None or generation != self.generation + 1:
+                self.local.clear()
+        self.generation = generation
+        self.checked_at = time.monotonic()
+
+    def count(self, tier, hits, misses):
+        self.stats[tier]['hits'] += hits
+        self.stats[tier]['misses'] += misses
+
+    def get_many(self, keys, local=True):
+        """Значения ключей keys; local=False — только из общего кэша,
+        например для чтения перед изменением."""
+        found = {}
+        keys = list(keys)
+        if local and is_local_enabled():
+            self.check_generation()
+            for key in keys:
+                value = self.local.get(key, _missing)
+                if value is not _missing:
+                    found[key] = value
+            self.count('local', len(found), len(keys) - len(found))
+        missing = [key for key in keys if key not in found]
+        if not missing:
+            return found
+        shared = self.shared.get_many(missing)
+        self.count('shared', len(shared), len(missing) - len(shared))
+        if local and is_local_enabled():
+            timeout = self.local_timeout(None)
+            for key, value in shared.items():
+                self.local.set(key, value, timeout)
+        found.update(shared)
+        return found
+
+    def get(self, key, default=None):
+        return self.get_many([key]).get(key, default)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, broadcast=True):
+        self.shared.set_many(data, timeout)
+        if not is_local_enabled():
+            return
+        if broadcast:
+            self.broadcast()
+        else:
+            self.check_generation()
+        local_timeout = self.local_timeout(timeout)
+        for key, value in data.items():
+            self.local.set(key, value, local_timeout)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, broadcast=True):
+        self.set_many({key: value}, timeout, broadcast)
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT):
+        value = self.get(key, _missing)
+        if value is _missing:
+            value = self.shared.get_or_set(key, default, timeout)
+            if is_local_enabled():
+                self.local.set(key, value, self.local_timeout(timeout))
+        return value
+
+    def delete_many(self, keys):
+        keys = list(keys)
+        self.shared.delete_many(keys)
+        if is_local_enabled():
+            for key in keys:
+                self.local.delete(key)
+            self.broadcast()
+
+    def delete(self, key):
+        self.delete_many([key])
+
+    def incr(self, key, delta=1):
+        value = self.shared.incr(key, delta)
+        if is_local_enabled():
+            self.local.delete(key)
+            self.broadcast()
+        return value
@@ -0,0 +1,65 @@
+import hmac
+import mimetypes
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+
+from .compression import accepted_encodings
+from .metrics import exposition, registry
+
+STATIC_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+# Имена с хэшем содержимого, которые создаёт ManifestStaticFilesStorage.
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+STATIC_CACHE_CONTROL = 'public, max-age=3600'
+
+
+def metrics(request):
+    """Метрики для запроса с заголовком Authorization: Bearer
+    <METRICS_TOKEN>; без заданного токена эндпоинт отключён.
+
+    Адрес клиента не проверяется: за обратным прокси на том же сервере
+    все запросы приходят с 127.0.0.1.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    scheme, _, credentials = request.headers.get(
+        'Authorization', '').partition(' ')
+    if not (token and scheme.lower() == 'bearer'
+            and hmac.compare_digest(credentials.encode(), token.encode())):
+        raise Http404
+    return HttpResponse(exposition(registry.collect()),
+                        content_type='text/plain; version=0.0.4')
+
+
+def static_file(request, path):
+    """Отдаёт файл из STATIC_ROOT, выбирая сжатый вариант по
+    Accept-Encoding; файлы с хэшем в имени кэшируются навсегда."""
+    try:
+        full_path = Path(safe_join(settings.STATIC_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404
+    if not full_path.is_file():
+        raise Http404
+    content_type, _ = mimetypes.guess_type(full_path.name)
+    encodings = accepted_encodings(request)
+    encoding = None
+    for name, suffix in STATIC_ENCODINGS:
+        variant = full_path.with_name(full_path.name + suffix)
+        if name in encodings and variant.is_file():
+            full_path, encoding = variant, name
+            break
+    response = FileResponse(
+        full_path.open('rb'),
+        content_type=content_type or 'application/octet-stream')
+    if encoding:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    response['Cache-Control'] = (IMMUTABLE_CACHE_CONTROL
+                                 if HASHED_NAME.search(path)
+                                 else STATIC_CACHE_CONTROL)
+    return response
@@ -1,22 +1,30 @@
 from django.views.generic import TemplateView
 from django.shortcuts import render
+from django.utils.decorators import method_decorator
 
+from core.page_cache import cached_page
 
+
+@method_decorator(cached_page('pages:about'), name='dispatch')
 class AboutPage(TemplateView):
     template_name = 'pages/about.html'
 
 
+@method_decorator(cached_page('pages:rules'), name='dispatch')
 class RulesPage(TemplateView):
     template_name = 'pages/rules.html'
 
 
+@cached_page('pages:404')
 def page_not_found(request, exception):
     return render(request, 'pages/404.html', status=404)
 
 
+@cached_page('pages:403csrf')
 def csrf_failure(request, reason=''):
     return render(request, 'pages/403csrf.html', status=403)
 
 
+@cached_page('pages:500')
 def server_error(request):
     return render(request, 'pages/500.html', status=500)
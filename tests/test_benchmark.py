@@ -0,0 +1,49 @@
+import pytest
+
+from core import benchmark
+
+
+@pytest.mark.django_db
+def test_benchmark_covers_every_route(mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category
+    )
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+    results = benchmark.run(
+        benchmark.get_sample(comment), requests=1, warmup=0
+    )
+    view_names = {name for name, _ in benchmark.iter_view_names()}
+    assert {key.split("|")[0] for key in results} == view_names, (
+        "Убедитесь, что замеры выполняются для всех маршрутов blog и pages."
+    )
+    assert results["blog:index|anonymous"]["status"] == 200
+    assert results["blog:index|anonymous"]["queries"] > 0
+    templates = results["blog:index|anonymous"]["templates"]
+    assert templates["includes/post_card.html"]["count"] == 1, (
+        "Убедитесь, что замеры учитывают число рендерингов каждого шаблона."
+    )
+
+
+def test_benchmark_compare_detects_regression():
+    base = {"status": 200, "p50_ms": 10.0, "p95_ms": 20.0, "queries": 5,
+            "bytes": 1000}
+    baseline = {"blog:index|anonymous": base}
+    assert not benchmark.compare(
+        {"blog:index|anonymous": {**base, "p50_ms": 11.0}}, baseline
+    )
+    regressions = benchmark.compare(
+        {"blog:index|anonymous": {**base, "queries": 6}}, baseline
+    )
+    assert len(regressions) == 1, (
+        "Убедитесь, что рост числа запросов к БД считается регрессией."
+    )
+
+
+def test_benchmark_compression_costs():
+    content = b"<div class='card'>post</div>\n" * 200
+    costs = benchmark.compression_costs(content, repeat=1)
+    assert {"gzip-1", "gzip-6", "gzip-9"} <= set(costs), (
+        "Убедитесь, что замеры сжатия выполняются для всех уровней gzip."
+    )
+    assert all(0 < row["saved"] < 1 and row["ms"] >= 0
+               for row in costs.values())
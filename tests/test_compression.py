@@ -0,0 +1,84 @@
+import gzip
+
+import pytest
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, override_settings
+
+from core import compression
+from core.middleware import CompressionMiddleware
+
+
+@pytest.mark.django_db
+def test_html_response_is_compressed(client, post_with_published_location):
+    plain = client.get("/")
+    response = client.get("/", HTTP_ACCEPT_ENCODING="gzip")
+    assert response["Content-Encoding"] == "gzip", (
+        "Убедитесь, что HTML-ответы сжимаются, если клиент поддерживает"
+        " gzip."
+    )
+    assert "Accept-Encoding" in response["Vary"]
+    assert gzip.decompress(response.content) == plain.content
+    assert len(response.content) < len(plain.content)
+    assert not plain.has_header("Content-Encoding"), (
+        "Убедитесь, что без Accept-Encoding ответ не сжимается."
+    )
+
+
+def test_streaming_response_is_compressed_by_chunks():
+    chunks = [f"<p>Строка {number}</p>\n".encode() * 20
+              for number in range(5)]
+    sent = []
+
+    def stream():
+        for chunk in chunks:
+            sent.append(chunk)
+            yield chunk
+
+    middleware = CompressionMiddleware(
+        lambda request: StreamingHttpResponse(stream(),
+                                              content_type="text/html"))
+    request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+    response = middleware(request)
+    assert response["Content-Encoding"] == "gzip"
+    content = iter(response.streaming_content)
+    first = next(content)
+    assert first and len(sent) == 1, (
+        "Убедитесь, что потоковый ответ сжимается по частям без"
+        " буферизации всего тела."
+    )
+    assert gzip.decompress(first + b"".join(content)) == b"".join(chunks)
+
+
+def test_compressed_variant_is_cached():
+    cache.clear()
+    data = b"<p>feed</p>" * 100
+    with override_settings(COMPRESSION_CACHE_ENABLED=True):
+        misses = compression.stats["misses"]
+        hits = compression.stats["hits"]
+        first = compression.compress_cached("gzip", data)
+        second = compression.compress_cached("gzip", data)
+    assert first == second
+    assert compression.stats["misses"] == misses + 1
+    assert compression.stats["hits"] == hits + 1, (
+        "Убедитесь, что сжатый вариант одинакового ответа берётся"
+        " из кэша."
+    )
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_personal_responses_are_not_cached(
+        client, user_client, post_with_published_location):
+    cache.clear()
+    with override_settings(COMPRESSION_CACHE_ENABLED=True):
+        misses = compression.stats["misses"]
+        response = user_client.get("/", HTTP_ACCEPT_ENCODING="gzip")
+        assert response["Content-Encoding"] == "gzip"
+        assert compression.stats["misses"] == misses, (
+            "Убедитесь, что сжатие ответов авторизованным пользователям"
+            " не кэшируется."
+        )
+        client.get("/", HTTP_ACCEPT_ENCODING="gzip")
+        assert compression.stats["misses"] == misses + 1
+    cache.clear()
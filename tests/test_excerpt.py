@@ -0,0 +1,54 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import Post
+
+TEXT = " ".join(f"слово{number}" for number in range(30))
+
+
+@pytest.mark.django_db
+def test_excerpt_is_saved(mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category, text=TEXT
+    )
+    assert post.excerpt == " ".join(TEXT.split()[:10]) + " …", (
+        "Убедитесь, что при сохранении публикации заполняется анонс"
+        " из первых 10 слов текста."
+    )
+    post.text = "Новый текст"
+    post.save(update_fields=["text"])
+    post.refresh_from_db()
+    assert post.excerpt == "Новый текст"
+
+
+@pytest.mark.django_db
+def test_feed_does_not_load_text(mixer, user, published_category):
+    mixer.blend(
+        "blog.Post", author=user, category=published_category, text=TEXT,
+        location=None, is_published=True,
+        pub_date=timezone.now() - timezone.timedelta(days=1)
+    )
+    with CaptureQueriesContext(connection) as context:
+        response = Client().get("/")
+    assert "слово0 слово1" in response.content.decode()
+    assert not any(
+        '"blog_post"."text"' in query["sql"]
+        for query in context.captured_queries
+    ), "Убедитесь, что лента публикаций не загружает полный текст."
+
+
+@pytest.mark.django_db
+def test_backfill_excerpts(mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category, text=TEXT
+    )
+    Post.objects.update(excerpt="")
+    call_command("backfill_excerpts", batch_size=1)
+    post.refresh_from_db()
+    assert post.excerpt.startswith("слово0"), (
+        "Убедитесь, что команда backfill_excerpts заполняет пустые анонсы."
+    )
@@ -0,0 +1,46 @@
+import csv
+import gzip
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+
+@pytest.mark.django_db
+def test_export_posts_jsonl(tmp_path, post_with_published_location):
+    output = tmp_path / "posts.jsonl"
+    call_command("export_blog", "posts", output=str(output))
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len(rows) == 1, (
+        "Убедитесь, что выгрузка публикаций содержит по строке на публикацию."
+    )
+    post = post_with_published_location
+    assert rows[0]["id"] == post.id
+    assert rows[0]["author__username"] == post.author.username
+    assert rows[0]["category__slug"] == post.category.slug
+    assert rows[0]["location__name"] == post.location.name
+
+
+@pytest.mark.django_db
+def test_export_comments_csv_gzip(tmp_path, comment):
+    output = tmp_path / "comments.csv.gz"
+    call_command(
+        "export_blog", "comments", fmt="csv", gzip=True, output=str(output)
+    )
+    with gzip.open(output, "rt", newline="") as stream:
+        rows = list(csv.DictReader(stream))
+    assert [row["id"] for row in rows] == [str(comment.id)], (
+        "Убедитесь, что сжатая выгрузка комментариев в CSV читается gzip."
+    )
+
+
+@pytest.mark.django_db
+def test_export_since(tmp_path, post_with_published_location):
+    output = tmp_path / "posts.jsonl"
+    since = (timezone.now() + timedelta(days=1)).isoformat()
+    call_command("export_blog", "posts", output=str(output), since=since)
+    assert output.read_text() == "", (
+        "Убедитесь, что параметр --since отбирает записи по created_at."
+    )
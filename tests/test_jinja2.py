@@ -0,0 +1,57 @@
+import pytest
+from bs4 import BeautifulSoup
+from django.test import override_settings
+from django.utils import timezone
+
+pytest.importorskip("jinja2")
+
+VIEW_NAMES = (
+    "blog:index", "blog:post_detail", "blog:category_posts", "blog:profile",
+    "blog:edit_profile", "blog:create_post", "blog:edit_post",
+    "blog:delete_post", "blog:edit_comment", "blog:delete_comment",
+)
+
+
+def page_summary(response):
+    soup = BeautifulSoup(response.content.decode(), features="html.parser")
+    return (
+        response.status_code,
+        sorted(link["href"] for link in soup.find_all("a")),
+        soup.get_text().split(),
+        sorted(field.get("name") or "" for field in soup.find_all("input")),
+    )
+
+
+@pytest.mark.django_db
+def test_jinja2_templates_match_django(
+        mixer, user, user_client, published_category
+):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        location=None, is_published=True,
+        pub_date=timezone.now() - timezone.timedelta(days=1)
+    )
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+    urls = (
+        "/", f"/posts/{post.id}/", f"/category/{published_category.slug}/",
+        f"/profile/{user.username}/", f"/profile/{user.username}/edit/",
+        "/posts/create/", f"/posts/{post.id}/edit/",
+        f"/posts/{post.id}/delete/",
+        f"/posts/{post.id}/edit_comment/{comment.id}/",
+        f"/posts/{post.id}/delete_comment/{comment.id}/",
+    )
+    jinja2 = {view_name: "jinja2" for view_name in VIEW_NAMES}
+    for url in urls:
+        expected = page_summary(user_client.get(url))
+        with override_settings(BLOG_TEMPLATE_ENGINES=jinja2):
+            response = user_client.get(url)
+        template = response.resolve_template(response.template_name)
+        assert template.backend.name == "jinja2", (
+            f"Убедитесь, что страница `{url}` рендерится движком, указанным"
+            " в BLOG_TEMPLATE_ENGINES."
+        )
+        actual = page_summary(response)
+        assert actual == expected, (
+            f"Убедитесь, что шаблон Jinja2 для страницы `{url}` выводит те же"
+            " ссылки, текст и поля форм, что и шаблон Django."
+        )
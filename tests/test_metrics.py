@@ -0,0 +1,107 @@
+import json
+import os
+
+import pytest
+from django.test import Client, override_settings
+
+METRICS_TOKEN = "secret"
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(tmp_path, post_with_published_location):
+    with override_settings(METRICS_ENABLED=True, METRICS_DIR=tmp_path,
+                           METRICS_TOKEN=METRICS_TOKEN):
+        client = Client()
+        client.get("/")
+        client.get(f"/posts/{post_with_published_location.id}/")
+        response = client.get(
+            "/metrics/", HTTP_AUTHORIZATION=f"Bearer {METRICS_TOKEN}")
+    assert response.status_code == 200
+    body = response.content.decode()
+    for line_start in (
+        'blogicum_requests_total{method="GET",status="200",'
+        'view="blog:index"}',
+        'blogicum_request_duration_seconds_bucket{le="+Inf",'
+        'view="blog:post_detail"}',
+        'blogicum_db_queries_total{view="blog:index"}',
+    ):
+        assert line_start in body, (
+            f"Убедитесь, что эндпоинт метрик содержит `{line_start}`."
+        )
+
+
+def test_metrics_aggregates_processes(tmp_path):
+    from core.metrics import exposition, registry
+
+    (tmp_path / "1.json").write_text(
+        '[["blogicum_requests_total", [["view", "blog:index"]], 2]]'
+    )
+    with override_settings(METRICS_DIR=tmp_path):
+        totals = registry.collect()
+    key = ("blogicum_requests_total", (("view", "blog:index"),))
+    assert totals[key] >= 2, (
+        "Убедитесь, что метрики других процессов суммируются."
+    )
+    assert "# TYPE blogicum_requests_total counter" in exposition(totals)
+
+
+@pytest.mark.django_db
+def test_metrics_require_token(tmp_path):
+    client = Client()
+    with override_settings(METRICS_DIR=tmp_path, METRICS_TOKEN=""):
+        assert client.get(
+            "/metrics/", HTTP_AUTHORIZATION="Bearer ").status_code == 404
+    with override_settings(METRICS_DIR=tmp_path,
+                           METRICS_TOKEN=METRICS_TOKEN):
+        assert client.get("/metrics/").status_code == 404, (
+            "Убедитесь, что метрики не выдаются без токена, в том числе"
+            " клиентам с 127.0.0.1."
+        )
+        assert client.get(
+            "/metrics/", HTTP_AUTHORIZATION="Bearer wrong").status_code == 404
+
+
+def test_exposition_keeps_large_counters_exact():
+    from core.metrics import exposition
+
+    body = exposition({
+        ("blogicum_requests_total", (("view", "blog:index"),)): 1234567.0,
+        ("blogicum_request_duration_seconds_sum", ()): 0.1234567891,
+    })
+    assert 'blogicum_requests_total{view="blog:index"} 1234567\n' in body, (
+        "Убедитесь, что большие счётчики выводятся без экспоненты"
+        " и без потери точности."
+    )
+    assert "blogicum_request_duration_seconds_sum 0.1234567891\n" in body
+
+
+def write_process_file(path, value):
+    path.write_text(json.dumps(
+        [["blogicum_requests_total", [["view", "blog:index"]], value]]))
+
+
+def test_finished_processes_are_archived(tmp_path):
+    from core.metrics import MetricsRegistry, registry
+
+    key = ("blogicum_requests_total", (("view", "blog:index"),))
+    # Несуществующий pid: процесс завершился, не перенеся значения.
+    write_process_file(tmp_path / "999999999-gone.json", 2)
+    with override_settings(METRICS_DIR=tmp_path):
+        assert registry.collect()[key] >= 2
+        assert not (tmp_path / "999999999-gone.json").exists(), (
+            "Убедитесь, что файлы завершившихся процессов переносятся"
+            " в архив."
+        )
+        assert registry.collect()[key] == registry.collect()[key]
+        before = registry.collect()[key]
+        # Новый процесс получил pid завершившегося.
+        write_process_file(tmp_path / f"{os.getpid()}-reused.json", 3)
+        reused = MetricsRegistry()
+        reused.flush()
+        assert registry.collect()[key] == before + 3, (
+            "Убедитесь, что процесс с повторно выданным pid не затирает"
+            " значения прежнего процесса."
+        )
+        reused.close()
+        assert registry.collect()[key] == before + 3
+        assert not reused.path.exists()
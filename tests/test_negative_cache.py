@@ -0,0 +1,132 @@
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, override_settings
+
+from blog import negative_cache
+from core.bloom import BloomFilter
+from core.models import Job
+
+
+@pytest.fixture
+def negative_lookups():
+    cache.clear()
+    indexes = (negative_cache.posts, negative_cache.categories,
+               negative_cache.users)
+    for index in indexes:
+        index.state = None
+    with override_settings(NEGATIVE_CACHE_ENABLED=True):
+        yield
+    cache.clear()
+    for index in indexes:
+        index.state = None
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000)
+    for value in range(1000):
+        bloom.add(value)
+    assert all(value in bloom for value in range(1000)), (
+        "Убедитесь, что фильтр Блума не теряет добавленные значения."
+    )
+    false_positives = sum(value in bloom for value in range(1000, 11000))
+    assert false_positives < 300
+    capped = BloomFilter(10 ** 6, max_size=8000)
+    assert len(capped.bits) == 1000, (
+        "Убедитесь, что размер фильтра Блума ограничивается max_size."
+    )
+    capped.add("value")
+    assert "value" in capped
+
+
+@pytest.mark.django_db
+def test_missing_category_skips_database(
+        negative_lookups, mixer, published_category,
+        django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    client = Client()
+    assert client.get(
+        f"/category/{published_category.slug}/").status_code == 200
+    with django_assert_num_queries(0):
+        assert client.get("/category/no-such-category/").status_code == 404
+    with django_capture_on_commit_callbacks(execute=True):
+        new_category = mixer.blend("blog.Category", is_published=True)
+    assert client.get(
+        f"/category/{new_category.slug}/").status_code == 200, (
+        "Убедитесь, что новая категория доступна сразу после создания."
+    )
+
+
+@pytest.mark.django_db
+def test_missing_post_is_cached(
+        negative_lookups, post_with_published_location,
+        django_assert_num_queries
+):
+    client = Client()
+    missing = f"/posts/{post_with_published_location.id + 100}/"
+    assert client.get(missing).status_code == 404
+    with django_assert_num_queries(0):
+        assert client.get(missing).status_code == 404, (
+            "Убедитесь, что повторный запрос несуществующей публикации"
+            " не обращается к БД."
+        )
+    assert client.get(
+        f"/posts/{post_with_published_location.id}/").status_code == 200
+
+
+@pytest.mark.django_db
+def test_new_user_profile_is_found(negative_lookups, mixer, user,
+                                   django_capture_on_commit_callbacks):
+    client = Client()
+    assert client.get(f"/profile/{user.username}/").status_code == 200
+    assert client.get("/profile/newcomer/").status_code == 404
+    with django_capture_on_commit_callbacks(execute=True):
+        mixer.blend("auth.User", username="newcomer")
+    assert client.get("/profile/newcomer/").status_code == 200, (
+        "Убедитесь, что профиль нового пользователя доступен сразу после"
+        " регистрации."
+    )
+
+
+@pytest.mark.django_db
+def test_evicted_generation_does_not_revive_stale_filter(
+        negative_lookups, mixer, published_category,
+        django_capture_on_commit_callbacks):
+    client = Client()
+    assert client.get("/category/fresh-category/").status_code == 404
+    stale = negative_cache.categories.state
+    cache.delete(negative_cache.categories.key("generation"))
+    with django_capture_on_commit_callbacks(execute=True):
+        mixer.blend("blog.Category", is_published=True,
+                    slug="fresh-category")
+    cache.delete(negative_cache.categories.key("generation"))
+    assert negative_cache.categories.generation() != stale["generation"]
+    assert client.get("/category/fresh-category/").status_code == 200, (
+        "Убедитесь, что после вытеснения счётчика поколения из кэша"
+        " устаревший фильтр не считается актуальным."
+    )
+
+
+@pytest.mark.django_db
+def test_filter_is_rebuilt_by_worker(
+        negative_lookups, user, django_assert_max_num_queries,
+        django_capture_on_commit_callbacks):
+    client = Client()
+    cache.clear()
+    negative_cache.users.state = None
+    with override_settings(TASKS_EAGER=False):
+        with django_capture_on_commit_callbacks(execute=True):
+            for username in ("nobody", "somebody"):
+                # Без фильтра запрос проверяет профиль в БД и не обходит
+                # таблицу пользователей.
+                with django_assert_max_num_queries(1):
+                    assert client.get(
+                        f"/profile/{username}/").status_code == 404
+        assert Job.objects.count() == 1, (
+            "Убедитесь, что фильтр Блума перестраивается задачей"
+            " очереди, а не в запросе, и ставится в очередь один раз."
+        )
+        call_command("run_worker", once=True)
+        with django_assert_max_num_queries(0):
+            assert client.get("/profile/anybody/").status_code == 404
+        assert client.get(f"/profile/{user.username}/").status_code == 200
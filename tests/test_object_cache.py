@@ -0,0 +1,88 @@
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+
+from blog import object_cache
+from blog.models import Post
+
+
+@pytest.fixture
+def cached_objects():
+    cache.clear()
+    with override_settings(OBJECT_CACHE_ENABLED=True):
+        yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_posts_are_loaded_in_one_round_trip(
+        cached_objects, mixer, user, published_category,
+        django_assert_num_queries):
+    posts = mixer.cycle(3).blend("blog.Post", author=user,
+                                 category=published_category)
+    pks = [post.pk for post in reversed(posts)]
+    load = object_cache.PostLoader()
+    with django_assert_num_queries(1):
+        assert [post.pk for post in load(pks)] == pks
+    with django_assert_num_queries(0):
+        loaded = load(pks)
+        assert loaded[0].author.username == user.username
+        assert loaded[0].category.slug == published_category.slug
+    with django_assert_num_queries(1):
+        counted = object_cache.PostLoader(comment_count=True)(pks)
+    assert [post.comment_count for post in counted] == [0, 0, 0], (
+        "Убедитесь, что число комментариев загружается отдельно"
+        " от кэшированных публикаций."
+    )
+
+
+@pytest.mark.django_db
+def test_object_cache_is_invalidated_on_save(
+        cached_objects, mixer, user, published_category,
+        django_assert_num_queries, django_capture_on_commit_callbacks):
+    post = mixer.blend("blog.Post", author=user,
+                       category=published_category)
+    object_cache.get_post(post.pk)
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        user.username = "renamed"
+        user.save()
+        assert object_cache.store.get(object_cache.users.key(user.pk)), (
+            "Убедитесь, что объект удаляется из кэша только после"
+            " фиксации транзакции."
+        )
+    assert callbacks
+    with django_assert_num_queries(1):
+        assert object_cache.get_post(post.pk).author.username == "renamed", (
+            "Убедитесь, что изменённый пользователь загружается из БД,"
+            " а публикация по-прежнему берётся из кэша."
+        )
+    with django_capture_on_commit_callbacks(execute=True):
+        post.title = "Новый заголовок"
+        post.save()
+    assert object_cache.get_post(post.pk).title == "Новый заголовок"
+    assert object_cache.users.get_by("username", "renamed") == user
+    with django_assert_num_queries(0):
+        object_cache.users.get_by("username", "renamed")
+
+
+@pytest.mark.django_db
+def test_bulk_commands_invalidate_cached_posts(
+        cached_objects, mixer, user, published_category,
+        django_capture_on_commit_callbacks):
+    post = mixer.blend("blog.Post", author=user, text="Текст",
+                       category=published_category)
+    Post.objects.filter(pk=post.pk).update(excerpt="", text_html_version=0)
+    assert object_cache.get_post(post.pk).excerpt == ""
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command("backfill_excerpts")
+    assert object_cache.get_post(post.pk).excerpt == "Текст", (
+        "Убедитесь, что backfill_excerpts удаляет обновлённые публикации"
+        " из кэша."
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command("rerender_text")
+    assert object_cache.get_post(post.pk).text_html_version != 0, (
+        "Убедитесь, что rerender_text удаляет обновлённые публикации"
+        " из кэша."
+    )
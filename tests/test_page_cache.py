@@ -0,0 +1,62 @@
+import gzip
+
+import pytest
+from django.core.cache import cache
+from django.test import Client, override_settings
+
+
+@pytest.fixture
+def page_cache():
+    cache.clear()
+    with override_settings(PAGE_CACHE_ENABLED=True):
+        yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_static_page_is_served_from_cache(page_cache, user_client):
+    client = Client()
+    first = client.get("/pages/about/")
+    second = client.get("/pages/about/")
+    assert second.content == first.content
+    assert not second.templates, (
+        "Убедитесь, что повторный запрос статической страницы отдаётся"
+        " из кэша без рендеринга шаблонов."
+    )
+    assert client.get(
+        "/pages/about/", HTTP_IF_NONE_MATCH=second["ETag"]
+    ).status_code == 304, (
+        "Убедитесь, что при совпадении ETag возвращается статус 304."
+    )
+    compressed = client.get("/pages/about/", HTTP_ACCEPT_ENCODING="gzip")
+    assert compressed["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed.content) == first.content
+    own = user_client.get("/pages/about/").content.decode()
+    assert "Выйти" in own and own != first.content.decode(), (
+        "Убедитесь, что авторизованные пользователи получают свой вариант"
+        " страницы."
+    )
+
+
+@pytest.mark.django_db
+def test_not_found_page_is_cached(page_cache):
+    client = Client()
+    first = client.get("/no-such-page/")
+    second = client.get("/another-missing-page/")
+    assert (first.status_code, second.status_code) == (404, 404)
+    assert second.content == first.content and not second.templates, (
+        "Убедитесь, что страница 404 рендерится один раз и затем"
+        " отдаётся из кэша."
+    )
+
+
+@pytest.mark.django_db
+def test_user_variant_follows_username(page_cache, user, user_client):
+    assert user.username in user_client.get("/pages/about/").content.decode()
+    user.username = "renamed_user"
+    user.save()
+    content = user_client.get("/pages/about/").content.decode()
+    assert "renamed_user" in content, (
+        "Убедитесь, что после смены имени пользователь получает"
+        " новый вариант страницы."
+    )
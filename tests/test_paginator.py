@@ -0,0 +1,23 @@
+import pytest
+from django.test import Client
+from django.utils import timezone
+
+
+@pytest.mark.django_db
+def test_paginator_is_elided(mixer, user, published_category):
+    mixer.cycle(200).blend(
+        "blog.Post", author=user, category=published_category,
+        location=None, is_published=True,
+        pub_date=timezone.now() - timezone.timedelta(days=1)
+    )
+    response = Client().get("/?page=10")
+    page_range = response.context["page_range"]
+    assert page_range == [1, "…", 8, 9, 10, 11, 12, "…", 20], (
+        "Убедитесь, что в контекст списка публикаций передаётся page_range"
+        " с первой и последней страницами и соседями текущей."
+    )
+    content = response.content.decode()
+    assert "?page=9" in content and "?page=20" in content
+    assert "?page=5" not in content, (
+        "Убедитесь, что пагинатор не выводит ссылки на все страницы."
+    )
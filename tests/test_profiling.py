@@ -0,0 +1,34 @@
+import pytest
+from django.test import Client, override_settings
+
+
+@pytest.mark.django_db
+def test_profiling_every_nth_request(tmp_path, post_with_published_location):
+    with override_settings(PROFILING_ENABLED=True, PROFILING_EVERY_N=2,
+                           PROFILING_DIR=tmp_path):
+        client = Client()
+        client.get("/")
+        assert not list(tmp_path.rglob("*.prof"))
+        client.get("/")
+    view_dir = tmp_path / "blog_index"
+    assert len(list(view_dir.glob("*.prof"))) == 1, (
+        "Убедитесь, что профилируется каждый N-й запрос и профиль"
+        " сохраняется в каталог страницы."
+    )
+    collapsed = next(view_dir.glob("*.collapsed")).read_text()
+    assert any("views:get_queryset" in line for line in collapsed.splitlines())
+
+
+@pytest.mark.django_db
+def test_profiling_by_header_and_disk_cap(tmp_path):
+    with override_settings(PROFILING_ENABLED=True, PROFILING_EVERY_N=0,
+                           PROFILING_TOKEN="secret", PROFILING_DIR=tmp_path,
+                           PROFILING_MAX_BYTES=1):
+        client = Client()
+        client.get("/pages/about/", HTTP_X_PROFILE_TOKEN="wrong")
+        assert not list(tmp_path.rglob("*.prof"))
+        client.get("/pages/about/", HTTP_X_PROFILE_TOKEN="secret")
+    assert not [path for path in tmp_path.rglob("*") if path.is_file()], (
+        "Убедитесь, что объём каталога профилей ограничен"
+        " PROFILING_MAX_BYTES."
+    )
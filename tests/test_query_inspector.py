@@ -0,0 +1,42 @@
+import pytest
+from django.db import connection
+from django.test import override_settings
+
+from blog.models import Post
+from core.queries import QueryInspector, fingerprint, make_report
+
+
+def test_fingerprint_ignores_values():
+    assert fingerprint(
+        'SELECT * FROM "blog_post" WHERE "id" = 1 AND "slug" = \'a\''
+    ) == fingerprint(
+        'SELECT * FROM "blog_post" WHERE "id" = 25 AND "slug" = \'b\''
+    )
+    assert fingerprint("SELECT 1 WHERE id IN (%s, %s, %s)") == fingerprint(
+        "SELECT 1 WHERE id IN (%s)"
+    )
+
+
+@pytest.mark.django_db
+def test_inspector_flags_related_field_lazy_loads(
+    many_posts_with_published_locations,
+):
+    inspector = QueryInspector()
+    with connection.execute_wrapper(inspector):
+        for post in Post.objects.all()[:5]:
+            post.category.title
+    repeated = inspector.repeated()
+    assert len(repeated) == 1 and repeated[0]["count"] == 5, (
+        "Убедитесь, что обращения к связанному полю в цикле"
+        " распознаются как N+1."
+    )
+    assert 'FROM "blog_category"' in repeated[0]["sql"]
+
+
+@override_settings(QUERY_BUDGETS={"blog:index": 1})
+def test_query_budget_report():
+    inspector = QueryInspector()
+    inspector.counts.update({"SELECT ?": 1, "SELECT ? FROM x": 1})
+    assert make_report("blog:index", inspector)["over_budget"], (
+        "Убедитесь, что превышение бюджета запросов отмечается в отчёте."
+    )
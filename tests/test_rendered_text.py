@@ -0,0 +1,47 @@
+import pytest
+from django.core.management import call_command
+from django.test import Client
+
+from blog.models import TEXT_RENDER_VERSION, Comment
+
+TEXT = "<b>жирный</b>\nвторая строка"
+HTML = "&lt;b&gt;жирный&lt;/b&gt;<br>вторая строка"
+
+
+@pytest.mark.django_db
+def test_text_html_is_saved(mixer, user, post_with_published_location):
+    comment = mixer.blend(
+        "blog.Comment", post=post_with_published_location, author=user,
+        text=TEXT
+    )
+    comment.refresh_from_db()
+    assert comment.text_html == HTML, (
+        "Убедитесь, что при сохранении комментария сохраняется его текст"
+        " в HTML: экранированный и с переносами строк."
+    )
+    assert comment.text_html_version == TEXT_RENDER_VERSION
+    response = Client().get(f"/posts/{post_with_published_location.id}/")
+    assert HTML in response.content.decode(), (
+        "Убедитесь, что на странице публикации выводится сохранённый HTML"
+        " комментария."
+    )
+
+
+@pytest.mark.django_db
+def test_stale_text_html_is_rerendered(
+        mixer, user, post_with_published_location
+):
+    comment = mixer.blend(
+        "blog.Comment", post=post_with_published_location, author=user,
+        text=TEXT
+    )
+    Comment.objects.update(text_html="", text_html_version=0)
+    comment.refresh_from_db()
+    assert comment.rendered_text == HTML, (
+        "Убедитесь, что HTML, сохранённый по старым правилам, не выводится."
+    )
+    call_command("rerender_text")
+    comment.refresh_from_db()
+    assert (comment.text_html, comment.text_html_version) == (
+        HTML, TEXT_RENDER_VERSION
+    ), "Убедитесь, что команда rerender_text пересобирает устаревший HTML."
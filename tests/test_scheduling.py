@@ -0,0 +1,101 @@
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog import scheduling
+from blog.models import Post
+from blog.signals import post_changed
+
+
+@pytest.fixture
+def scheduled_post(mixer, user, published_category):
+    cache.clear()
+    yield mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True,
+        pub_date=timezone.now() + timezone.timedelta(hours=1),
+    )
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_scheduled_post_is_released_at_pub_date(
+        scheduled_post, client, django_capture_on_commit_callbacks):
+    assert not scheduled_post.is_visible
+    assert scheduled_post not in client.get("/").context["object_list"]
+    remaining = scheduling.seconds_until_next_transition()
+    assert 3500 < remaining <= 3600, (
+        "Убедитесь, что время до ближайшей отложенной публикации"
+        " вычисляется по её pub_date."
+    )
+    changed = []
+
+    def listener(sender, pks, **kwargs):
+        changed.extend(pks)
+
+    post_changed.connect(listener)
+    try:
+        with django_capture_on_commit_callbacks(execute=True):
+            released = scheduling.release_due(
+                scheduled_post.pub_date + timezone.timedelta(seconds=1))
+    finally:
+        post_changed.disconnect(listener)
+    assert released == 1
+    assert changed == [scheduled_post.pk], (
+        "Убедитесь, что при наступлении даты публикации отправляется"
+        " сигнал post_changed, как при редактировании."
+    )
+    assert Post.objects.get(pk=scheduled_post.pk).is_visible
+    assert scheduling.seconds_until_next_transition() is None
+
+
+@pytest.mark.django_db
+def test_release_waits_for_next_transition(scheduled_post,
+                                           django_assert_num_queries):
+    scheduling.next_transition()
+    with django_assert_num_queries(0):
+        assert scheduling.release_due() == 0
+    scheduled_post.pub_date = timezone.now() - timezone.timedelta(minutes=1)
+    scheduled_post.save(update_fields=["pub_date"])
+    scheduled_post.refresh_from_db()
+    assert scheduled_post.is_visible, (
+        "Убедитесь, что при переносе даты публикации в прошлое публикация"
+        " отмечается сразу."
+    )
+
+
+@pytest.mark.django_db
+def test_publish_scheduled_command(scheduled_post):
+    Post.objects.filter(pk=scheduled_post.pk).update(
+        pub_date=timezone.now() - timezone.timedelta(minutes=1))
+    call_command("publish_scheduled")
+    assert Post.objects.get(pk=scheduled_post.pk).is_visible, (
+        "Убедитесь, что команда publish_scheduled отмечает публикации,"
+        " дата которых наступила."
+    )
+
+
+@pytest.mark.django_db
+def test_scheduled_lookups_use_partial_index(scheduled_post):
+    with CaptureQueriesContext(connection) as context:
+        scheduling.next_transition()
+        scheduling.release_due(force=True)
+    selects = [query["sql"] for query in context.captured_queries
+               if query["sql"].startswith("SELECT")
+               and '"blog_post"' in query["sql"]]
+    assert selects and all('NOT "blog_post"."is_visible"' in sql
+                           for sql in selects), (
+        "Убедитесь, что наступившие публикации ищутся только среди"
+        " скрытых, без запроса на скрытие видимых."
+    )
+    with connection.cursor() as cursor:
+        for sql in selects:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+            assert "blog_post_scheduled_idx" in plan, (
+                "Убедитесь, что поиск отложенных публикаций использует"
+                " частичный индекс."
+            )
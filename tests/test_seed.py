@@ -0,0 +1,50 @@
+from datetime import datetime
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import Comment, Post
+
+
+@pytest.mark.django_db
+def test_seed_blog_counts_and_mix():
+    call_command(
+        "seed_blog", users=5, categories=3, locations=2, posts=200,
+        comments=50, future_ratio=0.2, unpublished_ratio=0.2, workers=1,
+        batch_size=64,
+    )
+    assert Post.objects.count() == 200
+    assert Comment.objects.count() == 50
+    assert Post.objects.filter(pub_date__gt=timezone.now()).exists(), (
+        "Убедитесь, что генератор создаёт отложенные публикации."
+    )
+    assert Post.objects.filter(is_published=False).exists(), (
+        "Убедитесь, что генератор создаёт снятые с публикации записи."
+    )
+
+
+@pytest.mark.django_db
+def test_seed_blog_is_reproducible():
+    def snapshot():
+        return list(
+            Post.objects.order_by("pk").values_list(
+                "title", "author__username", "category__slug", "pub_date"
+            )
+        )
+
+    options = dict(users=3, categories=2, locations=0, posts=30, comments=0,
+                   seed=7, workers=1,
+                   epoch=datetime(2024, 1, 1, tzinfo=timezone.utc))
+    call_command("seed_blog", **options)
+    first = snapshot()
+    Post.objects.all().delete()
+    call_command("seed_blog", **{**options, "users": 0, "categories": 0})
+    second = snapshot()
+    assert [row[0] for row in second] == [row[0] for row in first], (
+        "Убедитесь, что одинаковое зерно даёт одинаковые данные."
+    )
+    assert [row[3] for row in second] == [row[3] for row in first], (
+        "Убедитесь, что при одинаковых зерне и epoch совпадают"
+        " и даты публикаций."
+    )
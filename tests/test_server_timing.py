@@ -0,0 +1,46 @@
+import pytest
+from django.test import Client, override_settings
+
+
+@pytest.mark.django_db
+@override_settings(SERVER_TIMING_ENABLED=True, SERVER_TIMING_SAMPLE_RATE=1)
+def test_server_timing_header(post_with_published_location):
+    response = Client().get("/")
+    header = response.get("Server-Timing", "")
+    for metric in ("db;dur=", "view;dur=", "tpl;dur=", "total;dur="):
+        assert metric in header, (
+            "Убедитесь, что заголовок Server-Timing содержит метрику"
+            f" `{metric[:-5]}`."
+        )
+
+
+@pytest.mark.django_db
+@override_settings(SERVER_TIMING_ENABLED=False)
+def test_server_timing_disabled():
+    assert "Server-Timing" not in Client().get("/"), (
+        "Убедитесь, что при SERVER_TIMING_ENABLED = False заголовок"
+        " Server-Timing не добавляется."
+    )
+
+
+@pytest.mark.django_db
+@override_settings(SERVER_TIMING_ENABLED=True, SERVER_TIMING_SAMPLE_RATE=0)
+def test_server_timing_sampling():
+    assert "Server-Timing" not in Client().get("/")
+
+
+@pytest.mark.django_db
+@override_settings(SERVER_TIMING_ENABLED=True, SERVER_TIMING_SAMPLE_RATE=1,
+                   SERVER_TIMING_TEMPLATES=10)
+def test_server_timing_templates(mixer, user, published_category):
+    mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category,
+        location=None
+    )
+    header = Client().get("/")["Server-Timing"]
+    for template in ("base.html x1", "includes/post_card.html x3",
+                     "includes/header.html x1"):
+        assert f'desc="{template}"' in header, (
+            "Убедитесь, что в заголовке Server-Timing указаны время и число"
+            f" рендерингов каждого шаблона (`{template}`)."
+        )
@@ -0,0 +1,49 @@
+import json
+import logging
+import logging.handlers
+
+import pytest
+from django.test import Client, override_settings
+
+from core.slow_queries import aggregate
+
+
+@pytest.fixture
+def slow_query_records():
+    handler = logging.handlers.BufferingHandler(capacity=10000)
+    logger = logging.getLogger("blogicum.slow_queries")
+    logger.addHandler(handler)
+    yield handler.buffer
+    logger.removeHandler(handler)
+
+
+@pytest.mark.django_db
+@override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+def test_slow_query_log_entry(
+    slow_query_records, post_with_published_location
+):
+    Client().get("/")
+    entries = [json.loads(record.getMessage())
+               for record in slow_query_records]
+    feed_entries = [entry for entry in entries
+                    if entry["view"] == "blog:index"
+                    and 'FROM "blog_post"' in entry["sql"]]
+    assert feed_entries, (
+        "Убедитесь, что медленные запросы записываются вместе с именем"
+        " страницы."
+    )
+    assert feed_entries[0]["plan"], (
+        "Убедитесь, что для медленных SELECT записывается"
+        " EXPLAIN QUERY PLAN."
+    )
+    assert "%s" not in feed_entries[0]["fingerprint"]
+
+
+def test_slow_query_aggregation():
+    def line(duration, sql="SELECT ?"):
+        return json.dumps({"fingerprint": sql, "duration_ms": duration,
+                           "view": "blog:index", "plan": []})
+
+    groups = aggregate([line(10), line(30), line(5, "SELECT ? FROM x")])
+    assert [group["count"] for group in groups] == [2, 1]
+    assert groups[0]["total_ms"] == 40 and groups[0]["max_ms"] == 30
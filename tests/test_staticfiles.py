@@ -0,0 +1,47 @@
+import gzip
+import json
+
+from django.core.management import call_command
+from django.test import RequestFactory, override_settings
+
+from core.staticfiles import purge_css
+from core.views import static_file
+
+CSS = (
+    ":root{--x:1}.used{color:red}.unused{color:blue}"
+    ".used,.unused .used{margin:0}"
+    "@media (min-width:576px){.unused{padding:0}.used:not(.unused){top:0}}"
+)
+
+
+def test_purge_css_keeps_used_selectors():
+    assert purge_css(CSS, {"used"}) == (
+        ":root{--x:1}.used{color:red}.used{margin:0}"
+        "@media (min-width:576px){.used:not(.unused){top:0}}"
+    ), "Убедитесь, что из CSS удаляются правила для неиспользуемых классов."
+
+
+def test_collectstatic_purges_hashes_and_compresses(tmp_path):
+    storage = "core.staticfiles.CompressedManifestStaticFilesStorage"
+    with override_settings(STATIC_ROOT=tmp_path, STATICFILES_STORAGE=storage):
+        call_command("collectstatic", interactive=False, verbosity=0)
+        manifest = json.loads((tmp_path / "staticfiles.json").read_text())
+        hashed = manifest["paths"]["css/bootstrap.min.css"]
+        css = (tmp_path / hashed).read_bytes()
+        assert len(css) < 60_000 and b".card-body" in css, (
+            "Убедитесь, что из Bootstrap удаляются стили, которые не"
+            " используются в шаблонах."
+        )
+        assert gzip.decompress(
+            (tmp_path / f"{hashed}.gz").read_bytes()) == css
+        request = RequestFactory().get(
+            f"/static/{hashed}", HTTP_ACCEPT_ENCODING="gzip, deflate")
+        response = static_file(request, hashed)
+    assert response["Content-Encoding"] == "gzip"
+    assert response["Content-Type"] == "text/css"
+    assert "immutable" in response["Cache-Control"], (
+        "Убедитесь, что файлы с хэшем в имени отдаются с заголовком"
+        " Cache-Control: immutable."
+    )
+    assert b"".join(response.streaming_content) == (
+        tmp_path / f"{hashed}.gz").read_bytes()
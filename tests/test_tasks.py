@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from core import tasks
+from core.checks import check_shared_cache
+from core.locks import cache_lock
+from core.models import Job
+
+calls = []
+
+
+@tasks.task
+def flaky(value):
+    calls.append(value)
+    if len(calls) == 1:
+        raise RuntimeError("Временная ошибка")
+
+
+@pytest.fixture
+def queued():
+    calls.clear()
+    with override_settings(TASKS_EAGER=False, TASK_MAX_ATTEMPTS=2):
+        yield
+
+
+@pytest.mark.django_db
+def test_task_is_enqueued_on_commit_and_retried(
+        queued, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        tasks.enqueue(flaky, 1)
+        assert not Job.objects.exists(), (
+            "Убедитесь, что задача ставится в очередь только после"
+            " фиксации транзакции."
+        )
+    call_command("run_worker", once=True)
+    job = Job.objects.get()
+    assert (job.status, job.attempts) == (Job.QUEUED, 1), (
+        "Убедитесь, что задача с ошибкой возвращается в очередь."
+    )
+    assert job.run_at > timezone.now()
+    assert "Временная ошибка" in job.last_error
+    Job.objects.update(run_at=timezone.now())
+    call_command("run_worker", once=True)
+    assert calls == [1, 1]
+    assert not Job.objects.exists(), (
+        "Убедитесь, что выполненная задача удаляется из очереди."
+    )
+
+
+@pytest.mark.django_db
+def test_abandoned_job_is_picked_up_again(queued):
+    job = Job.objects.create(
+        task=flaky.task_name, args=[2], max_attempts=2, attempts=1,
+        status=Job.RUNNING,
+        locked_until=timezone.now() + timedelta(minutes=1))
+    assert tasks.claim() is None, (
+        "Убедитесь, что занятая исполнителем задача не выдаётся другому."
+    )
+    claimed = tasks.claim(now=timezone.now() + timedelta(minutes=2))
+    assert (claimed.pk, claimed.attempts) == (job.pk, 2), (
+        "Убедитесь, что задача с истёкшим временем захвата выдаётся"
+        " повторно."
+    )
+    Job.objects.update(locked_until=timezone.now())
+    assert tasks.claim(now=timezone.now() + timedelta(minutes=1)) is None
+    assert Job.objects.get().status == Job.FAILED
+
+
+def test_queued_timelines_require_shared_cache():
+    with override_settings(TIMELINES_ENABLED=True, TASKS_EAGER=False):
+        errors = check_shared_cache(None)
+    assert [error.id for error in errors] == ["core.E003"], (
+        "Убедитесь, что обновление лент в run_worker нельзя включить"
+        " поверх LocMemCache."
+    )
+    with override_settings(TIMELINES_ENABLED=True, TASKS_EAGER=True):
+        assert check_shared_cache(None) == []
+
+
+@tasks.task(serial=True)
+def serial(value):
+    calls.append(value)
+
+
+@pytest.mark.django_db
+def test_serial_task_waits_for_running_one(queued):
+    Job.objects.create(task=serial.task_name, args=[3], max_attempts=2)
+    with cache_lock(f"tasks:serial:{serial.task_name}") as acquired:
+        assert acquired
+        call_command("run_worker", once=True)
+        job = Job.objects.get()
+        assert not calls, (
+            "Убедитесь, что последовательная задача не выполняется, пока"
+            " такую же выполняет другой исполнитель."
+        )
+        assert (job.status, job.attempts) == (Job.QUEUED, 0)
+    Job.objects.update(run_at=timezone.now())
+    call_command("run_worker", once=True)
+    assert calls == [3]
+    assert not Job.objects.exists()
@@ -0,0 +1,46 @@
+from django.template import engines
+from django.test import override_settings
+
+from core.checks import check_template_syntax
+from core.templates import warm_up_templates
+
+
+def make_templates(directory, loaders):
+    return [{
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": [directory],
+        "OPTIONS": {"loaders": loaders},
+    }]
+
+
+def test_project_templates_compile():
+    assert check_template_syntax(None) == [], (
+        "Убедитесь, что все шаблоны проекта компилируются без ошибок."
+    )
+
+
+def test_template_syntax_check_fails(tmp_path):
+    (tmp_path / "ok.html").write_text("{{ value }}")
+    (tmp_path / "broken.html").write_text("{% if value %}")
+    loaders = ["django.template.loaders.filesystem.Loader"]
+    with override_settings(TEMPLATES=make_templates(tmp_path, loaders)):
+        errors = check_template_syntax(None)
+    assert [error.id for error in errors] == ["core.E001"], (
+        "Убедитесь, что проверка шаблонов сообщает о синтаксической ошибке."
+    )
+    assert "broken.html" in errors[0].msg
+
+
+def test_warm_up_fills_cached_loader(tmp_path):
+    (tmp_path / "includes").mkdir()
+    (tmp_path / "includes" / "card.html").write_text("{{ value }}")
+    loaders = [("django.template.loaders.cached.Loader",
+                ["django.template.loaders.filesystem.Loader"])]
+    with override_settings(TEMPLATES=make_templates(tmp_path, loaders),
+                           TEMPLATE_WARMUP=True):
+        warm_up_templates()
+        loader = engines["django"].engine.template_loaders[0]
+        assert "includes/card.html" in loader.get_template_cache, (
+            "Убедитесь, что при старте шаблоны компилируются и попадают"
+            " в кэш загрузчика."
+        )
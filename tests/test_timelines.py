@@ -0,0 +1,137 @@
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog import object_cache, timelines
+from blog.models import Post
+
+
+@pytest.fixture
+def timeline_posts(mixer, user, published_category):
+    cache.clear()
+    now = timezone.now()
+    with override_settings(TIMELINES_ENABLED=True, TIMELINE_LENGTH=3,
+                           TASKS_EAGER=True):
+        yield [
+            mixer.blend("blog.Post", author=user, is_published=True,
+                        category=published_category,
+                        pub_date=now - timezone.timedelta(days=day))
+            for day in range(1, 6)
+        ]
+    cache.clear()
+
+
+def expected_feed():
+    return list(Post.objects.filter(is_visible=True).order_by(
+        *timelines.ORDERING))
+
+
+@pytest.mark.django_db
+def test_feed_is_sliced_from_cached_timeline(timeline_posts, client):
+    sequence = timelines.TimelineSequence(
+        timelines.index(), object_cache.PostLoader())
+    assert len(sequence) == 5
+    assert sequence[0:5] == expected_feed(), (
+        "Убедитесь, что лента из кэша совпадает с лентой из БД, в том"
+        " числе за пределами сохранённого списка."
+    )
+    assert sequence[3:5] == expected_feed()[3:5]
+    response = client.get("/")
+    assert list(response.context["page_obj"]) == expected_feed()
+
+
+@pytest.mark.django_db
+def test_timeline_is_updated_on_write(timeline_posts, mixer, user,
+                                      published_category):
+    timelines.index().get()
+    newest = mixer.blend("blog.Post", author=user, is_published=True,
+                         category=published_category,
+                         pub_date=timezone.now())
+    entry = timelines.index().get()
+    assert -entry["items"][0][1] == newest.pk, (
+        "Убедитесь, что новая публикация добавляется в начало ленты"
+        " в кэше."
+    )
+    assert entry["count"] == 6
+    newest.is_published = False
+    newest.save()
+    entry = timelines.index().get()
+    assert newest.pk not in [-pk for _, pk in entry["items"]], (
+        "Убедитесь, что снятая с публикации запись удаляется из ленты."
+    )
+    timeline_posts[0].delete()
+    assert timelines.category(
+        published_category.pk).get()["count"] == 4
+    call_command("rebuild_timelines")
+    assert [-pk for _, pk in timelines.index().get()["items"]] == [
+        post.pk for post in expected_feed()[:3]]
+
+
+@pytest.mark.django_db
+def test_edit_does_not_recount_other_feeds(timeline_posts, mixer,
+                                           published_category):
+    categories = mixer.cycle(5).blend("blog.Category", is_published=True)
+    for timeline in [timelines.index(), timelines.category(
+            published_category.pk)] + [
+            timelines.category(category.pk) for category in categories]:
+        timeline.get()
+    post = timeline_posts[-1]
+    post.title = "Новый заголовок"
+    with CaptureQueriesContext(connection) as context:
+        post.save()
+    assert not [query for query in context.captured_queries
+                if "COUNT(" in query["sql"]], (
+        "Убедитесь, что правка публикации без смены категории"
+        " и видимости не пересчитывает ленты."
+    )
+    post.category = categories[0]
+    with CaptureQueriesContext(connection) as context:
+        post.save()
+    assert len([query for query in context.captured_queries
+                if "COUNT(" in query["sql"]]) == 1
+    assert timelines.category(published_category.pk).get()["count"] == 4
+    assert timelines.category(categories[0].pk).get()["count"] == 1
+
+
+@pytest.mark.django_db
+def test_generation_does_not_repeat_after_eviction(timeline_posts):
+    generation = timelines.get_generation()
+    cache.delete(timelines.GENERATION_KEY)
+    assert timelines.get_generation() != generation, (
+        "Убедитесь, что после вытеснения счётчика поколения лент"
+        " старые списки не используются снова."
+    )
+
+
+@pytest.mark.django_db
+def test_concurrent_updates_keep_both_posts(timeline_posts, mixer, user,
+                                            published_category,
+                                            monkeypatch):
+    timelines.index().get()
+    with override_settings(TIMELINES_ENABLED=False):
+        first, second = mixer.cycle(2).blend(
+            "blog.Post", author=user, is_published=True,
+            category=published_category, pub_date=timezone.now())
+    apply = timelines.Timeline.apply
+    interleaved = []
+
+    def apply_interleaved(timeline, entry, rows, previous=None):
+        # Пока первое обновление держит запись, приходит второе.
+        if not interleaved:
+            interleaved.append(True)
+            timelines.update([second.pk], [[second.pk, None, None]])
+        return apply(timeline, entry, rows, previous)
+
+    monkeypatch.setattr(timelines.Timeline, "apply", apply_interleaved)
+    with override_settings(TIMELINE_LOCK_WAIT=0):
+        timelines.update([first.pk], [[first.pk, None, None]])
+    entry = timelines.index().get()
+    assert {first.pk, second.pk} <= {-pk for _, pk in entry["items"]}, (
+        "Убедитесь, что одновременные обновления ленты не затирают"
+        " друг друга."
+    )
+    assert entry["count"] == 7
@@ -0,0 +1,83 @@
+import pytest
+from django.core.cache import cache
+from django.test import override_settings
+
+from core.checks import check_shared_cache
+from core.metrics import cache_stats_providers
+from core.two_tier_cache import TwoTierCache
+
+
+@pytest.fixture
+def local_cache():
+    cache.clear()
+    with override_settings(LOCAL_CACHE_ENABLED=True,
+                           LOCAL_CACHE_CHECK_INTERVAL=3600):
+        yield
+    cache.clear()
+
+
+def test_local_tier_serves_repeated_reads(local_cache):
+    store = TwoTierCache('test:reads')
+    store.set('key', 'value')
+    cache.set('key', 'changed')
+    assert store.get('key') == 'value', (
+        "Убедитесь, что повторное чтение обслуживается кэшем процесса."
+    )
+    assert store.get_many(['key'], local=False) == {'key': 'changed'}
+    assert store.get('other') is None
+    assert cache_stats_providers['test:reads:local']() == {
+        'hits': 1, 'misses': 1}
+    assert cache_stats_providers['test:reads:shared']() == {
+        'hits': 1, 'misses': 1}
+
+
+def test_writes_are_broadcast_to_other_processes(local_cache):
+    # Два экземпляра с одним именем — как два процесса с общим кэшем;
+    # между процессами работает только с общим бэкендом (core.E002).
+    first = TwoTierCache('test:broadcast')
+    second = TwoTierCache('test:broadcast')
+    first.set('key', 'old')
+    assert second.get('key') == 'old'
+    first.delete('key')
+    assert second.get('key') == 'old'
+    second.checked_at = float('-inf')
+    assert second.get('key') is None, (
+        "Убедитесь, что удаление в одном процессе сбрасывает кэш"
+        " остальных процессов после проверки поколения."
+    )
+    second.set('filled', 'value', broadcast=False)
+    assert first.get('filled') == 'value'
+
+
+def test_local_tier_is_bounded(local_cache):
+    store = TwoTierCache('test:bounded', max_entries=2)
+    store.set_many({'a': 1, 'b': 2})
+    store.get('a')
+    store.set('c', 3)
+    assert store.local.get('b') is None, (
+        "Убедитесь, что при переполнении вытесняется давно"
+        " не читавшийся ключ."
+    )
+    assert store.local.get('a') == 1
+    assert len(store.local) == 2
+
+
+def test_local_tier_returns_copies(local_cache):
+    store = TwoTierCache('test:copies')
+    store.set('post', {'title': 'Заголовок'})
+    first = store.get('post')
+    first['comment_count'] = 3
+    assert store.get('post') == {'title': 'Заголовок'}, (
+        "Убедитесь, что изменения прочитанного значения не попадают"
+        " в кэш процесса и не видны другим запросам."
+    )
+
+
+def test_local_tier_requires_shared_cache():
+    with override_settings(LOCAL_CACHE_ENABLED=True):
+        errors = check_shared_cache(None)
+    assert [error.id for error in errors] == ["core.E002"], (
+        "Убедитесь, что кэш процесса нельзя включить поверх LocMemCache."
+    )
+    with override_settings(LOCAL_CACHE_ENABLED=False):
+        assert check_shared_cache(None) == []
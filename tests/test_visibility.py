@@ -0,0 +1,56 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Post
+from blog.signals import post_changed
+
+
+@pytest.mark.django_db
+def test_category_publication_updates_posts_in_bulk(
+        mixer, user, published_category):
+    posts = mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True,
+    )
+    assert all(post.is_visible for post in posts)
+    changed = []
+
+    def listener(sender, pks, **kwargs):
+        changed.extend(pks)
+
+    post_changed.connect(listener)
+    try:
+        published_category.is_published = False
+        published_category.save()
+    finally:
+        post_changed.disconnect(listener)
+    assert not Post.objects.filter(is_visible=True).exists(), (
+        "Убедитесь, что снятие категории с публикации скрывает"
+        " её публикации."
+    )
+    assert sorted(changed) == sorted(post.pk for post in posts), (
+        "Убедитесь, что для скрытых публикаций отправляется сигнал"
+        " post_changed."
+    )
+    published_category.is_published = True
+    published_category.save()
+    assert Post.objects.filter(is_visible=True).count() == 3
+    published_category.delete()
+    assert not Post.objects.filter(is_visible=True).exists(), (
+        "Убедитесь, что публикации удалённой категории скрываются."
+    )
+
+
+@pytest.mark.django_db
+def test_feed_does_not_filter_by_category(client,
+                                          post_with_published_location):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get("/")
+    assert post_with_published_location in response.context["object_list"]
+    count_sql = next(query["sql"] for query in context.captured_queries
+                     if "COUNT(" in query["sql"])
+    assert "blog_category" not in count_sql, (
+        "Убедитесь, что лента отбирает публикации по полю is_visible"
+        " без соединения с таблицей категорий."
+    )
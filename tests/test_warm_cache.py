@@ -0,0 +1,38 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+
+from blog import warmup
+
+
+@pytest.mark.django_db
+def test_warm_cache_requests_important_pages(
+        tmp_path, mixer, user, published_category,
+        post_with_published_location):
+    mixer.blend("blog.Comment", post=post_with_published_location,
+                author=user)
+    urls = list(warmup.iter_urls(pages=3, authors=1, posts=1))
+    assert urls == [
+        "/",
+        f"/category/{published_category.slug}/",
+        f"/profile/{user.username}/",
+        f"/posts/{post_with_published_location.pk}/",
+    ], (
+        "Убедитесь, что прогреваются главная, опубликованные категории,"
+        " профили авторов и обсуждаемые публикации."
+    )
+    with pytest.raises(CommandError):
+        call_command("warm_cache", threads=1)
+    out = StringIO()
+    with override_settings(CACHES={"default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": tmp_path,
+    }}):
+        call_command("warm_cache", threads=1, stdout=out)
+    lines = out.getvalue().splitlines()
+    assert all(line.startswith("200 ") for line in lines[:-1]), (
+        "Убедитесь, что для каждой страницы выводятся код ответа и время."
+    )
+    assert lines[-1].startswith("Страниц: 4")